@@ -111,6 +111,34 @@ class TestTextScrubbing:
         assert "2023-06-15" not in result
         assert "[DATE_REDACTED]" in result
 
+    def test_iso_date_followed_by_time(self):
+        # The short date form must not match inside the ISO date
+        result = anon.scrub_text("Admitted 2023-07-14-09:30", field_name="test")
+        assert "2023" not in result
+        assert "07-14" not in result
+        assert "[DATE_REDACTED]" in result
+
+    def test_iso_date_followed_by_digits(self):
+        result = anon.scrub_text("Seen 2020-01-15-123 Main St", field_name="test")
+        assert "2020" not in result
+        assert "01-15" not in result
+
+    def test_month_date_followed_by_numeric_date(self):
+        result = anon.scrub_text("Seen January 15 1980/12/25/1990", field_name="test")
+        assert "1980" not in result
+        assert "1990" not in result
+
+    def test_zip_does_not_swallow_adjoining_date(self):
+        # Patterns apply by priority, not by leftmost match position
+        result = anon.scrub_text("Call 90210-2024-05-06 today", field_name="test")
+        assert "05-06" not in result
+        assert "[DATE_REDACTED]" in result
+
+    def test_email_does_not_swallow_following_mrn(self):
+        result = anon.scrub_text("mail a@b.co.Record No. 123456", field_name="test")
+        assert "a@b.co" not in result
+        assert "123456" not in result
+
     def test_mrn(self):
         result = anon.scrub_text("MRN: 12345678", field_name="test")
         assert "12345678" not in result
@@ -126,6 +154,11 @@ class TestTextScrubbing:
         result = anon.scrub_text(text, field_name="test")
         assert result == text
 
+    def test_non_ascii_digits_scrubbed(self):
+        # Unicode digits bypass the ASCII-only RE2 prefilter and still get scrubbed
+        result = anon.scrub_text("SSN ١٢٣-٤٥-٦٧٨٩", field_name="test")
+        assert "١٢٣-٤٥-٦٧٨٩" not in result
+
     def test_combined_phi_in_message(self):
         msg = "I'm a patient, my email is me@clinic.org, phone 555-999-0000, DOB 03/22/1975"
         result = anon.scrub_text(msg, field_name="test")
@@ -230,6 +263,30 @@ class TestImageExifStrip:
         except ImportError:
             pytest.skip("piexif not installed — skipping EXIF content test")
 
+    def test_jpeg_comment_stripped(self):
+        from PIL import Image
+        img = Image.new("RGB", (10, 10), color=(100, 150, 200))
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", comment=b"Patient John Smith")
+        raw = buf.getvalue()
+        result = anon.scrub_image(raw, field_name="comment_test")
+        assert b"John Smith" not in result
+        assert Image.open(io.BytesIO(result)).format == "JPEG"
+
+    def test_png_text_chunks_stripped(self):
+        """PNG text chunks are dropped and the image stays a PNG."""
+        from PIL import Image, PngImagePlugin
+        img = Image.new("RGB", (10, 10), color=(0, 255, 0))
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Author", "Patient John Smith")
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", pnginfo=info)
+        result = anon.scrub_image(buf.getvalue(), field_name="png_test")
+        clean_img = Image.open(io.BytesIO(result))
+        assert clean_img.format == "PNG"
+        assert "Author" not in clean_img.info
+        assert b"John Smith" not in result
+
     def test_bad_image_returns_original(self):
         """Corrupted/non-image bytes should not raise — returns original."""
         bad_bytes = b"this is not an image"
@@ -237,6 +294,51 @@ class TestImageExifStrip:
         assert result == bad_bytes
 
 
+# ---------------------------------------------------------------------------
+# PDF metadata stripping
+# ---------------------------------------------------------------------------
+
+class TestPdfMetadataStrip:
+    def _make_pdf_with_metadata(self) -> bytes:
+        """Create a one-page PDF with document info and XMP naming the patient."""
+        pypdf = pytest.importorskip("pypdf")
+        writer = pypdf.PdfWriter()
+        writer.add_blank_page(width=200, height=200)
+        writer.add_metadata({"/Author": "John Smith", "/Title": "CBC for John Smith"})
+        writer.xmp_metadata = (
+            b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF '
+            b'xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+            b"<rdf:Description>Patient John Smith</rdf:Description>"
+            b"</rdf:RDF></x:xmpmeta>"
+        )
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+    def test_info_and_xmp_stripped(self):
+        pypdf = pytest.importorskip("pypdf")
+        raw = self._make_pdf_with_metadata()
+        assert b"John Smith" in raw
+        result = anon.scrub_pdf(raw, field_name="pdf_test")
+        assert b"John Smith" not in result
+        reader = pypdf.PdfReader(io.BytesIO(result))
+        assert not reader.metadata
+        assert "/Metadata" not in reader.trailer["/Root"]
+        assert len(reader.pages) == 1
+
+    @pytest.mark.filterwarnings("error::DeprecationWarning")
+    def test_no_deprecated_pypdf_calls(self):
+        """A deprecated pypdf argument becomes a TypeError in the next major."""
+        raw = self._make_pdf_with_metadata()
+        assert b"John Smith" not in anon.scrub_pdf(raw, field_name="pdf_test")
+
+    def test_bad_pdf_raises(self):
+        """Unlike images, an unreadable PDF is never passed through unscrubbed."""
+        pytest.importorskip("pypdf")
+        with pytest.raises(ValueError):
+            anon.scrub_pdf(b"%PDF-1.7 this is not a pdf", field_name="bad_pdf")
+
+
 # ---------------------------------------------------------------------------
 # No PHI in return values (regression guard)
 # ---------------------------------------------------------------------------
@@ -0,0 +1,320 @@
+"""
+Testing/test_bedrock.py
+-----------------------
+Unit tests for the async Bedrock Runtime client, run against an
+``httpx.MockTransport`` instead of AWS.
+
+Run with:
+    cd c:\\Users\\Kesav\\OneDrive\\Desktop\\Hackathon\\Respiratory_Disease_Classifier_API
+    uv run python -m pytest Testing/test_bedrock.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import struct
+import sys
+from urllib.parse import quote
+
+# Make sure project root is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+httpx = pytest.importorskip("httpx")
+
+from app import bedrock
+from app.bedrock import BedrockRuntimeClient, _error_message
+
+_REGION = "us-east-1"
+_SECRET = "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY"
+_MODEL = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+
+
+def _client(handler, max_attempts: int = 3) -> tuple[BedrockRuntimeClient, list[httpx.Request]]:
+    """Client whose HTTP calls go to ``handler``; also returns the list of requests seen."""
+    seen = []
+
+    def record(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return handler(request)
+
+    session = boto3.Session(
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key=_SECRET,
+        aws_session_token="session-token",
+    )
+    client = BedrockRuntimeClient(session, _REGION, max_attempts=max_attempts)
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(record))
+    return client, seen
+
+
+def _responses(*responses: httpx.Response):
+    """Handler that returns ``responses`` in order (an exception instance is raised)."""
+    queue = list(responses)
+
+    def handler(request):
+        response = queue.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return handler
+
+
+def _invoke(client: BedrockRuntimeClient, model_id: str = _MODEL) -> bytes:
+    async def go():
+        try:
+            return await client.invoke_model(modelId=model_id, body='{"prompt": "hi"}')
+        finally:
+            await client.aclose()
+
+    return asyncio.run(go())
+
+
+def _stream(client: BedrockRuntimeClient, events: list | None = None) -> list[dict]:
+    """Collect the streamed events (into ``events`` too, so they survive a raise)."""
+    events = [] if events is None else events
+
+    async def go():
+        try:
+            async for event in client.invoke_model_stream(modelId=_MODEL, body=b"{}"):
+                events.append(event)
+        finally:
+            await client.aclose()
+
+    asyncio.run(go())
+    return events
+
+
+def _frame(headers: dict[str, str], payload: bytes) -> bytes:
+    """Encode one ``application/vnd.amazon.eventstream`` message."""
+    encoded_headers = b"".join(
+        bytes([len(name)]) + name.encode() + b"\x07"
+        + struct.pack(">H", len(value)) + value.encode()
+        for name, value in headers.items()
+    )
+    prelude = struct.pack(">II", 12 + len(encoded_headers) + len(payload) + 4, len(encoded_headers))
+    message = prelude + struct.pack(">I", binascii.crc32(prelude)) + encoded_headers + payload
+    return message + struct.pack(">I", binascii.crc32(message))
+
+
+def _chunk_frame(event: dict) -> bytes:
+    payload = json.dumps({"bytes": base64.b64encode(json.dumps(event).encode()).decode()})
+    return _frame(
+        {":message-type": "event", ":event-type": "chunk", ":content-type": "application/json"},
+        payload.encode(),
+    )
+
+
+def _expected_signature(request: httpx.Request) -> str:
+    """SigV4 signature of ``request`` as received, computed from the AWS spec."""
+    authorization = request.headers["authorization"]
+    signed_headers = authorization.split("SignedHeaders=")[1].split(",")[0]
+    amz_date = request.headers["x-amz-date"]
+    scope = f"{amz_date[:8]}/{_REGION}/bedrock/aws4_request"
+
+    canonical_request = "\n".join([
+        request.method,
+        # Non-S3 services sign the already-encoded path encoded once more
+        quote(request.url.raw_path.decode(), safe="/~"),
+        "",
+        "".join(
+            f"{name}:{' '.join(request.headers[name].split())}\n"
+            for name in signed_headers.split(";")
+        ),
+        signed_headers,
+        hashlib.sha256(request.content).hexdigest(),
+    ])
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256",
+        amz_date,
+        scope,
+        hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+
+    key = ("AWS4" + _SECRET).encode()
+    for part in (amz_date[:8], _REGION, "bedrock", "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(bedrock.random, "random", lambda: 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Request signing
+# ---------------------------------------------------------------------------
+
+class TestSigning:
+    def test_model_id_with_colon_signed_as_sent(self):
+        client, seen = _client(_responses(httpx.Response(200, content=b'{"ok": true}')))
+        assert _invoke(client) == b'{"ok": true}'
+
+        request = seen[0]
+        assert request.url.host == f"bedrock-runtime.{_REGION}.amazonaws.com"
+        assert request.url.raw_path == b"/model/anthropic.claude-3-5-sonnet-20240620-v1%3A0/invoke"
+        assert request.content == b'{"prompt": "hi"}'
+        assert request.headers["authorization"].endswith(
+            "Signature=" + _expected_signature(request)
+        )
+
+    def test_signed_headers_cover_content_and_latency(self):
+        client, seen = _client(_responses(httpx.Response(200, content=b"{}")))
+        _invoke(client)
+
+        request = seen[0]
+        authorization = request.headers["authorization"]
+        assert authorization.startswith("AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/")
+        assert f"/{_REGION}/bedrock/aws4_request" in authorization
+        signed = authorization.split("SignedHeaders=")[1].split(",")[0].split(";")
+        for name in ("content-type", "host", "x-amz-date", "x-amz-security-token",
+                     "x-amzn-bedrock-performanceconfig-latency"):
+            assert name in signed
+        assert request.headers["x-amz-security-token"] == "session-token"
+        assert request.headers["x-amzn-bedrock-performanceconfig-latency"] == "standard"
+
+    def test_each_retry_is_signed(self):
+        client, seen = _client(_responses(httpx.Response(503), httpx.Response(200, content=b"{}")))
+        _invoke(client)
+        assert len(seen) == 2
+        for request in seen:
+            assert request.headers["authorization"].endswith(
+                "Signature=" + _expected_signature(request)
+            )
+
+
+# ---------------------------------------------------------------------------
+# Retries
+# ---------------------------------------------------------------------------
+
+class TestRetry:
+    @pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+    def test_transient_status_retried(self, status):
+        client, seen = _client(_responses(httpx.Response(status), httpx.Response(200, content=b"done")))
+        assert _invoke(client) == b"done"
+        assert len(seen) == 2
+
+    def test_transport_error_retried(self):
+        client, seen = _client(
+            _responses(httpx.ConnectError("reset"), httpx.Response(200, content=b"done"))
+        )
+        assert _invoke(client) == b"done"
+        assert len(seen) == 2
+
+    @pytest.mark.parametrize("status", [400, 403, 404])
+    def test_client_error_not_retried(self, status):
+        client, seen = _client(
+            _responses(httpx.Response(status, json={"message": "Malformed input request"}))
+        )
+        with pytest.raises(RuntimeError, match=rf"\({status}\): Malformed input request"):
+            _invoke(client)
+        assert len(seen) == 1
+
+    def test_gives_up_after_max_attempts(self):
+        client, seen = _client(
+            _responses(*[httpx.Response(429, json={"message": "Too many requests"})] * 3)
+        )
+        with pytest.raises(RuntimeError, match=r"\(429\): Too many requests"):
+            _invoke(client)
+        assert len(seen) == 3
+
+    def test_transport_error_raised_after_max_attempts(self):
+        client, seen = _client(_responses(*[httpx.ConnectError("reset")] * 2), max_attempts=2)
+        with pytest.raises(httpx.ConnectError):
+            _invoke(client)
+        assert len(seen) == 2
+
+    def test_stream_start_retried(self):
+        client, seen = _client(_responses(
+            httpx.Response(429),
+            httpx.Response(200, content=_chunk_frame({"type": "message_stop"})),
+        ))
+        assert _stream(client) == [{"type": "message_stop"}]
+        assert len(seen) == 2
+        assert seen[1].url.raw_path.endswith(b"/invoke-with-response-stream")
+
+    def test_stream_client_error_not_retried(self):
+        client, seen = _client(_responses(httpx.Response(400, json={"message": "Bad body"})))
+        with pytest.raises(RuntimeError, match=r"\(400\): Bad body"):
+            _stream(client)
+        assert len(seen) == 1
+
+
+# ---------------------------------------------------------------------------
+# Error body parsing
+# ---------------------------------------------------------------------------
+
+class TestErrorMessage:
+    def test_lowercase_message(self):
+        assert _error_message(httpx.Response(400, json={"message": "Bad input"})) == "Bad input"
+
+    def test_capitalised_message(self):
+        assert _error_message(httpx.Response(403, json={"Message": "Denied"})) == "Denied"
+
+    def test_json_without_message_returns_body(self):
+        assert _error_message(httpx.Response(500, content=b'{"code": 1}')) == '{"code": 1}'
+
+    def test_non_object_json_returns_body(self):
+        assert _error_message(httpx.Response(500, content=b'["x"]')) == '["x"]'
+
+    def test_non_json_returns_text(self):
+        assert _error_message(httpx.Response(502, content=b"<html>Bad Gateway</html>")) == (
+            "<html>Bad Gateway</html>"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Event-stream decoding
+# ---------------------------------------------------------------------------
+
+class TestEventStream:
+    EVENTS = [
+        {"type": "message_start", "message": {"usage": {"input_tokens": 12}}},
+        {"type": "content_block_delta", "delta": {"text": "Hello"}},
+        {"type": "content_block_delta", "delta": {"text": " world"}},
+        {"type": "message_delta", "usage": {"output_tokens": 2}},
+    ]
+
+    def test_chunks_decoded_in_order(self):
+        body = b"".join(_chunk_frame(event) for event in self.EVENTS)
+        client, _ = _client(_responses(httpx.Response(200, content=body)))
+        assert _stream(client) == self.EVENTS
+
+    def test_frames_split_across_reads(self):
+        body = b"".join(_chunk_frame(event) for event in self.EVENTS)
+
+        async def pieces():
+            for i in range(0, len(body), 7):
+                yield body[i:i + 7]
+
+        client, _ = _client(_responses(httpx.Response(200, content=pieces())))
+        assert _stream(client) == self.EVENTS
+
+    def test_non_chunk_events_skipped(self):
+        body = (
+            _frame({":message-type": "event", ":event-type": "initial-response"}, b"{}")
+            + _chunk_frame(self.EVENTS[1])
+        )
+        client, _ = _client(_responses(httpx.Response(200, content=body)))
+        assert _stream(client) == [self.EVENTS[1]]
+
+    def test_exception_frame_raises_after_earlier_events(self):
+        body = _chunk_frame(self.EVENTS[1]) + _frame(
+            {":message-type": "exception", ":exception-type": "throttlingException"},
+            b'{"message": "Too many tokens"}',
+        )
+        client, _ = _client(_responses(httpx.Response(200, content=body)))
+        events = []
+        with pytest.raises(RuntimeError, match=r"throttlingException\): Too many tokens"):
+            _stream(client, events)
+        assert events == [self.EVENTS[1]]
@@ -0,0 +1,167 @@
+"""
+Testing/test_compression.py
+---------------------------
+Unit tests for the gzip request-body middleware.
+
+Run with:
+    cd c:\\Users\\Kesav\\OneDrive\\Desktop\\Hackathon\\Respiratory_Disease_Classifier_API
+    uv run python -m pytest Testing/test_compression.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import os
+import sys
+import tracemalloc
+
+# Make sure project root is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from app.compression import GZipRequestMiddleware
+
+_LIMIT = 1024 * 1024
+
+
+def _run(body_chunks: list[bytes], encoding: str = "gzip", max_size: int = _LIMIT):
+    """Send ``body_chunks`` through the middleware; return (scope, body) seen by the app."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        seen["scope"], seen["body"] = scope, body
+
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(body_chunks) - 1}
+        for i, chunk in enumerate(body_chunks)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    scope = {
+        "type": "http",
+        "headers": [
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(sum(map(len, body_chunks))).encode()),
+            (b"content-type", b"application/json"),
+        ],
+    }
+    asyncio.run(GZipRequestMiddleware(app, max_size=max_size)(scope, receive, send))
+    return seen["scope"], seen["body"]
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)] or [b""]
+
+
+# ---------------------------------------------------------------------------
+# Normal bodies
+# ---------------------------------------------------------------------------
+
+class TestInflate:
+    def test_single_message(self):
+        payload = b'{"disease": "COPD"}' * 100
+        scope, body = _run([gzip.compress(payload)])
+        assert body == payload
+
+    def test_chunked_message(self):
+        payload = os.urandom(200_000)
+        _, body = _run(_chunks(gzip.compress(payload), 4096))
+        assert body == payload
+
+    def test_encoding_headers_stripped(self):
+        scope, _ = _run([gzip.compress(b"hello")])
+        names = {key for key, _ in scope["headers"]}
+        assert b"content-encoding" not in names
+        assert b"content-length" not in names
+        assert b"content-type" in names
+
+    def test_plain_body_passes_through(self):
+        scope, body = _run([b"not compressed"], encoding="identity")
+        assert body == b"not compressed"
+        assert (b"content-encoding", b"identity") in scope["headers"]
+
+    def test_body_at_limit_accepted(self):
+        payload = b"\0" * _LIMIT
+        _, body = _run([gzip.compress(payload)])
+        assert len(body) == _LIMIT
+
+
+# ---------------------------------------------------------------------------
+# Malicious / broken bodies
+# ---------------------------------------------------------------------------
+
+class TestRejection:
+    BOMB = gzip.compress(b"\0" * (64 * _LIMIT))  # ~64 KB that inflates to 64 MB
+
+    @pytest.mark.parametrize("chunk_size", [None, 16 * 1024])
+    def test_bomb_rejected_without_full_inflate(self, chunk_size):
+        chunks = [self.BOMB] if chunk_size is None else _chunks(self.BOMB, chunk_size)
+        tracemalloc.start()
+        try:
+            with pytest.raises(ValueError, match="too large"):
+                _run(chunks)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # Only about one limit's worth of output may ever be materialised
+        assert peak < 8 * _LIMIT
+
+    def test_body_one_byte_over_limit_rejected(self):
+        with pytest.raises(ValueError, match="too large"):
+            _run([gzip.compress(b"\0" * (_LIMIT + 1))])
+
+    def test_truncated_stream_rejected(self):
+        data = gzip.compress(os.urandom(10_000))
+        with pytest.raises(ValueError, match="Truncated"):
+            _run(_chunks(data[: len(data) // 2], 1024))
+
+
+# ---------------------------------------------------------------------------
+# Response compression (Starlette's GZipMiddleware, configured as in main.py)
+# ---------------------------------------------------------------------------
+
+class TestResponseGzip:
+    @pytest.fixture(scope="class")
+    def client(self):
+        from fastapi import FastAPI
+        from fastapi.middleware.gzip import GZipMiddleware
+        from fastapi.responses import PlainTextResponse, StreamingResponse
+        from fastapi.testclient import TestClient
+
+        app = FastAPI()
+        app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
+        @app.get("/text")
+        def text():
+            return PlainTextResponse("report " * 1000)
+
+        @app.get("/events")
+        def events():
+            async def stream():
+                for _ in range(100):
+                    yield b"event: delta\ndata: {\"text\": \"report line\"}\n\n"
+
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        return TestClient(app)
+
+    def test_large_text_compressed(self, client):
+        response = client.get("/text", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+
+    def test_event_stream_not_compressed(self, client):
+        response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.text.count("event: delta") == 100
@@ -0,0 +1,64 @@
+"""
+Testing/test_model_utils.py
+---------------------------
+Unit tests for the audio loader's decoder fallbacks.
+
+Run with:
+    cd c:\\Users\\Kesav\\OneDrive\\Desktop\\Hackathon\\Respiratory_Disease_Classifier_API
+    uv run python -m pytest Testing/test_model_utils.py -v
+"""
+
+from __future__ import annotations
+
+import glob
+import io
+import os
+import shutil
+import subprocess
+import sys
+
+# Make sure project root is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+
+librosa = pytest.importorskip("librosa")
+
+import numpy as np
+from model_utils import AudioLoader
+
+_WAV_FILE = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.wav")))[-1]
+
+
+# ---------------------------------------------------------------------------
+# Mislabelled uploads
+# ---------------------------------------------------------------------------
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+class TestMislabelledUpload:
+    @pytest.fixture(scope="class")
+    def m4a_path(self, tmp_path_factory):
+        path = str(tmp_path_factory.mktemp("audio") / "sample.m4a")
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-nostdin", "-i", _WAV_FILE, "-c:a", "aac", path],
+            check=True,
+        )
+        return path
+
+    def test_m4a_named_wav_decoded_like_path(self, m4a_path):
+        with open(m4a_path, "rb") as f:
+            upload = io.BytesIO(f.read())
+        upload.name = "upload0.wav"
+
+        filename, info = AudioLoader()._load_one(upload)
+        expected, sr = librosa.load(m4a_path, mono=True)
+
+        assert filename == "upload0.wav"
+        assert info["sample_rate"] == sr
+        np.testing.assert_array_equal(info["data"], expected)
+
+    def test_undecodable_upload_raises(self):
+        upload = io.BytesIO(b"RIFF not really audio")
+        upload.name = "broken.wav"
+        with pytest.raises(subprocess.CalledProcessError):
+            AudioLoader()._load_one(upload)
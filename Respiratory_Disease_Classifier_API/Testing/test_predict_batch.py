@@ -0,0 +1,151 @@
+"""
+Testing/test_predict_batch.py
+-----------------------------
+End-to-end tests for POST /predict/batch, using the sample recordings in
+this folder and the real model.
+
+Run with:
+    cd c:\\Users\\Kesav\\OneDrive\\Desktop\\Hackathon\\Respiratory_Disease_Classifier_API
+    uv run python -m pytest Testing/test_predict_batch.py -v
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import sys
+
+# Make sure project root is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+
+pytest.importorskip("librosa")
+pytest.importorskip("sklearn")
+
+from fastapi.testclient import TestClient
+
+from app.cache import PredictionCache
+from app.routers import predict as predict_router
+
+_WAV_FILES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.wav")))
+
+
+def _upload(path: str) -> tuple[str, tuple[str, bytes, str]]:
+    with open(path, "rb") as f:
+        return ("files", (os.path.basename(path), f.read(), "audio/wav"))
+
+
+@pytest.fixture(scope="module")
+def client():
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def classify_calls(client, monkeypatch):
+    """Fresh prediction cache; records how many uploads each ``_classify`` call decoded."""
+    client.app.state.cache = PredictionCache()
+    calls = []
+    classify = predict_router._classify
+
+    def recording_classify(model, pipeline, uploads):
+        calls.append(len(uploads))
+        return classify(model, pipeline, uploads)
+
+    monkeypatch.setattr(predict_router, "_classify", recording_classify)
+    return calls
+
+
+@pytest.fixture(scope="module")
+def single_results(client):
+    """``/predict`` result for each sample, classified one at a time."""
+    client.app.state.cache = PredictionCache()
+    results = {}
+    for path in _WAV_FILES[:3]:
+        _, upload = _upload(path)
+        response = client.post("/predict", files={"file": upload})
+        assert response.status_code == 200
+        results[path] = response.json()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Results
+# ---------------------------------------------------------------------------
+
+class TestBatchResults:
+    def test_results_in_upload_order(self, client, single_results, classify_calls):
+        paths = list(reversed(_WAV_FILES[:3]))
+        response = client.post("/predict/batch", files=[_upload(p) for p in paths])
+        assert response.status_code == 200
+        assert response.json()["results"] == [single_results[p] for p in paths]
+        # All three decoded and classified together
+        assert classify_calls == [3]
+
+    def test_repeated_file_classified_once(self, client, single_results, classify_calls):
+        a, b = _WAV_FILES[:2]
+        response = client.post("/predict/batch", files=[_upload(a), _upload(b), _upload(a)])
+        assert response.status_code == 200
+        assert response.json()["results"] == [single_results[a], single_results[b], single_results[a]]
+        assert classify_calls == [2]
+
+    def test_mixed_cached_and_uncached(self, client, single_results, classify_calls):
+        a, b, c = _WAV_FILES[:3]
+        _, upload = _upload(b)
+        assert client.post("/predict", files={"file": upload}).status_code == 200
+        assert classify_calls == [1]
+
+        response = client.post("/predict/batch", files=[_upload(a), _upload(b), _upload(c)])
+        assert response.status_code == 200
+        assert response.json()["results"] == [single_results[a], single_results[b], single_results[c]]
+        # Only the two uncached files went through the model
+        assert classify_calls == [1, 2]
+
+    def test_fully_cached_batch_skips_model(self, client, single_results, classify_calls):
+        a, b = _WAV_FILES[:2]
+        files = [_upload(a), _upload(b)]
+        assert client.post("/predict/batch", files=files).status_code == 200
+        response = client.post("/predict/batch", files=files)
+        assert response.status_code == 200
+        assert response.json()["results"] == [single_results[a], single_results[b]]
+        assert classify_calls == [2]
+
+
+# ---------------------------------------------------------------------------
+# Limits and failures
+# ---------------------------------------------------------------------------
+
+class TestBatchRejection:
+    def test_max_files_accepted(self, client, single_results, classify_calls):
+        a = _WAV_FILES[0]
+        files = [_upload(a)] * predict_router._MAX_BATCH_FILES
+        response = client.post("/predict/batch", files=files)
+        assert response.status_code == 200
+        assert response.json()["results"] == [single_results[a]] * predict_router._MAX_BATCH_FILES
+        assert classify_calls == [1]
+
+    def test_too_many_files_rejected(self, client, classify_calls):
+        files = [_upload(_WAV_FILES[0])] * (predict_router._MAX_BATCH_FILES + 1)
+        response = client.post("/predict/batch", files=files)
+        assert response.status_code == 400
+        assert str(predict_router._MAX_BATCH_FILES) in response.json()["detail"]
+        assert classify_calls == []
+
+    def test_non_audio_file_rejected(self, client, classify_calls):
+        files = [_upload(_WAV_FILES[0]), ("files", ("notes.txt", b"hello", "text/plain"))]
+        response = client.post("/predict/batch", files=files)
+        assert response.status_code == 400
+        assert classify_calls == []
+
+    def test_one_bad_file_fails_the_batch(self, client, classify_calls):
+        a = _WAV_FILES[0]
+        files = [_upload(a), ("files", ("broken.wav", b"RIFF not really audio", "audio/wav"))]
+        response = client.post("/predict/batch", files=files)
+        assert response.status_code == 500
+        assert response.json()["detail"].startswith("Batch prediction failed:")
+        # Nothing from the failed batch is cached, so the good file is
+        # classified again next time
+        assert len(client.app.state.cache) == 0
@@ -0,0 +1,211 @@
+"""
+Testing/test_streaming.py
+-------------------------
+Route tests for the Server-Sent Events endpoints, with the LLM stream
+replaced by a scripted one.
+
+Run with:
+    cd c:\\Users\\Kesav\\OneDrive\\Desktop\\Hackathon\\Respiratory_Disease_Classifier_API
+    uv run python -m pytest Testing/test_streaming.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+
+# Make sure project root is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.routers import report as report_router
+from app.routers import scan as scan_router
+from app.text_formatter import strip_markdown
+
+REPORT_CHUNKS = [
+    "# COPD Rep", "ort\n\n## Over", "view\n**Chronic** obstructive ",
+    "pulmonary disease.\n\n\n\n- Use your `inhaler`\n", "- Rest",
+]
+
+# Findings block split across chunks, followed by the Markdown report
+SCAN_CHUNKS = [
+    "```json\n{\"findings\": [{\"region\": \"left lower lobe\", ",
+    "\"finding\": \"opacity\"}], \"urgency\": \"ur", "gent\"}\n```\n",
+    "## Impression\n**Consolidation** in the left lower lobe.\n",
+]
+
+XRAY_FILE = os.path.join(os.path.dirname(__file__), "chest-x-ray-image-normal-chest-2NM1K95.jpg")
+
+
+def _scripted_stream(chunks: list[str], fail_after: int | None = None,
+                     first_delay: float = 0.0, later_delay: float = 0.0):
+    """Stand-in for ``invoke_llm_stream`` that yields ``chunks``."""
+    async def invoke_llm_stream(request, system_prompt, messages,
+                                temperature=0.4, max_tokens=4096, usage=None):
+        if usage is not None:
+            usage.update(prompt_tokens=11, completion_tokens=7, total_tokens=18)
+        await asyncio.sleep(first_delay)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(later_delay)
+            yield chunk
+            if fail_after is not None and index + 1 == fail_after:
+                raise RuntimeError("provider connection dropped")
+
+    return invoke_llm_stream
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    """Parse an SSE body into ``(event, data)`` pairs."""
+    events = []
+    for block in body.split("\n\n"):
+        if not block:
+            continue
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+@pytest.fixture(scope="module")
+def client():
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def deadline(client, monkeypatch):
+    """Shrink ``llm_deadline_seconds`` for one test; returns the value used."""
+    seconds = 0.2
+    settings = client.app.state.settings.model_copy(update={"llm_deadline_seconds": seconds})
+    monkeypatch.setattr(client.app.state, "settings", settings)
+    return seconds
+
+
+# ---------------------------------------------------------------------------
+# POST /report/stream
+# ---------------------------------------------------------------------------
+
+class TestReportStream:
+    BODY = {"disease": "COPD", "age": 64}
+
+    def test_deltas_then_done(self, client, monkeypatch):
+        monkeypatch.setattr(report_router, "invoke_llm_stream", _scripted_stream(REPORT_CHUNKS))
+        response = client.post("/report/stream", json=self.BODY)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _events(response.text)
+        names = [name for name, _ in events]
+        assert names[-1] == "done" and names.count("done") == 1
+        assert set(names[:-1]) == {"delta"}
+        assert "".join(data["text"] for _, data in events[:-1]) == strip_markdown("".join(REPORT_CHUNKS))
+
+        done = events[-1][1]
+        assert done["disease"] == "COPD"
+        assert done["patient_info"] == {"age": 64, "height": None, "weight": None}
+        assert done["tokens_used"] == {"prompt_tokens": 11, "completion_tokens": 7, "total_tokens": 18}
+
+    def test_failure_after_first_delta_is_error_event(self, client, monkeypatch):
+        monkeypatch.setattr(
+            report_router, "invoke_llm_stream", _scripted_stream(REPORT_CHUNKS, fail_after=3)
+        )
+        response = client.post("/report/stream", json=self.BODY)
+
+        assert response.status_code == 200
+        events = _events(response.text)
+        assert [name for name, _ in events][-1] == "error"
+        assert "done" not in [name for name, _ in events]
+        assert events[0] == ("delta", {"text": "COPD Report"})
+        assert events[-1][1] == {"detail": "Report generation failed: provider connection dropped"}
+
+    def test_failure_before_first_delta_is_500(self, client, monkeypatch):
+        async def failing(*args, **kwargs):
+            raise RuntimeError("bad credentials")
+            yield  # pragma: no cover
+
+        monkeypatch.setattr(report_router, "invoke_llm_stream", failing)
+        response = client.post("/report/stream", json=self.BODY)
+        assert response.status_code == 500
+        assert response.json()["detail"] == "Report generation failed: bad credentials"
+
+    def test_deadline_before_first_delta_is_504(self, client, monkeypatch, deadline):
+        monkeypatch.setattr(
+            report_router, "invoke_llm_stream", _scripted_stream(REPORT_CHUNKS, first_delay=deadline * 5)
+        )
+        response = client.post("/report/stream", json=self.BODY)
+        assert response.status_code == 504
+
+    def test_deadline_mid_stream_is_error_event(self, client, monkeypatch, deadline):
+        monkeypatch.setattr(
+            report_router, "invoke_llm_stream", _scripted_stream(REPORT_CHUNKS, later_delay=deadline * 5)
+        )
+        response = client.post("/report/stream", json=self.BODY)
+        assert response.status_code == 200
+        assert _events(response.text)[-1] == (
+            "error", {"detail": "Report generation failed: AI provider timed out"}
+        )
+
+
+# ---------------------------------------------------------------------------
+# POST /scan/analyze/stream
+# ---------------------------------------------------------------------------
+
+class TestScanStream:
+    @staticmethod
+    def _post(client):
+        with open(XRAY_FILE, "rb") as f:
+            return client.post(
+                "/scan/analyze/stream",
+                files={"file": ("xray.jpg", f.read(), "image/jpeg")},
+                data={"scan_type": "chest_xray"},
+            )
+
+    def test_done_carries_findings_from_full_output(self, client, monkeypatch):
+        monkeypatch.setattr(scan_router, "invoke_llm_stream", _scripted_stream(SCAN_CHUNKS))
+        response = self._post(client)
+
+        assert response.status_code == 200
+        events = _events(response.text)
+        names = [name for name, _ in events]
+        assert names[-1] == "done" and names.count("done") == 1
+        assert set(names[:-1]) == {"delta"}
+        assert "".join(data["text"] for _, data in events[:-1]) == strip_markdown("".join(SCAN_CHUNKS))
+
+        done = events[-1][1]
+        assert done["scan_type"] == "chest_xray"
+        assert done["findings"] == {
+            "findings": [{"region": "left lower lobe", "finding": "opacity"}],
+            "urgency": "urgent",
+        }
+        assert done["tokens_used"] == {"prompt_tokens": 11, "completion_tokens": 7, "total_tokens": 18}
+
+    def test_no_findings_block_gives_empty_findings(self, client, monkeypatch):
+        monkeypatch.setattr(scan_router, "invoke_llm_stream", _scripted_stream(SCAN_CHUNKS[3:]))
+        events = _events(self._post(client).text)
+        assert events[-1][0] == "done"
+        assert events[-1][1]["findings"] == {}
+
+    def test_deadline_before_first_delta_is_504(self, client, monkeypatch, deadline):
+        monkeypatch.setattr(
+            scan_router, "invoke_llm_stream", _scripted_stream(SCAN_CHUNKS, first_delay=deadline * 5)
+        )
+        response = self._post(client)
+        assert response.status_code == 504
+        assert response.json()["detail"] == "Scan analysis failed: AI provider timed out"
+
+    def test_deadline_mid_stream_is_error_event(self, client, monkeypatch, deadline):
+        monkeypatch.setattr(
+            scan_router, "invoke_llm_stream", _scripted_stream(SCAN_CHUNKS, later_delay=deadline * 5)
+        )
+        response = self._post(client)
+        assert response.status_code == 200
+        events = _events(response.text)
+        assert "done" not in [name for name, _ in events]
+        assert events[-1] == ("error", {"detail": "Scan analysis failed: AI provider timed out"})
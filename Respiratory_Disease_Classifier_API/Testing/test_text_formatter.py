@@ -0,0 +1,143 @@
+"""
+Testing/test_text_formatter.py
+------------------------------
+Unit tests for the Markdown → plain text conversion, in particular that
+the streaming stripper matches the one-shot one wherever the reply is
+split into chunks, and for pulling the JSON out of a fenced LLM reply.
+
+Run with:
+    cd c:\\Users\\Kesav\\OneDrive\\Desktop\\Hackathon\\Respiratory_Disease_Classifier_API
+    uv run python -m pytest Testing/test_text_formatter.py -v
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+
+# Make sure project root is on the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from app.text_formatter import MarkdownStreamStripper, extract_code_block, strip_markdown
+
+REPORT = """
+
+# 🫁 Patient Report — COPD
+
+## Overview
+**Chronic obstructive pulmonary disease** is a *progressive* lung condition.
+It is ***common*** in __smokers__ and _former smokers_.
+
+
+
+## Key Values
+| Test | Result | Range |
+|------|:------:|------:|
+| FEV1 | 62% | > 80% |
+
+---
+
+- Use your `inhaler` as prescribed
+* See [your doctor](https://example.com) every 3 months
+> Quit smoking — it is the **single most effective** step.
+
+```json
+{"urgency": "routine",   "follow_up": "3 months"}
+
+  indented **kept** as-is
+```
+1. Breathe
+2. Rest   \t
+
+⚕️ **Disclaimer**: AI-generated.  \n\n\n"""
+
+
+def _stream(chunks: list[str]) -> str:
+    stripper = MarkdownStreamStripper()
+    return "".join(stripper.feed(chunk) for chunk in chunks) + stripper.flush()
+
+
+def _random_chunks(text: str, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.choice([1, 2, 3, 5, 8, 13, 40, 200])
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Streaming stripper == one-shot stripper
+# ---------------------------------------------------------------------------
+
+class TestMarkdownStreamStripper:
+    EXPECTED = strip_markdown(REPORT)
+
+    def test_whole_text_in_one_chunk(self):
+        assert _stream([REPORT]) == self.EXPECTED
+
+    def test_every_two_way_split(self):
+        for i in range(len(REPORT) + 1):
+            assert _stream([REPORT[:i], REPORT[i:]]) == self.EXPECTED, f"split at {i}"
+
+    def test_one_character_chunks(self):
+        assert _stream(list(REPORT)) == self.EXPECTED
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_random_chunk_boundaries(self, seed):
+        assert _stream(_random_chunks(REPORT, seed)) == self.EXPECTED
+
+    def test_empty_chunks_ignored(self):
+        chunks = [piece for chunk in _random_chunks(REPORT, 0) for piece in ("", chunk, "")]
+        assert _stream(chunks) == self.EXPECTED
+
+    @pytest.mark.parametrize("text", [
+        "",
+        "\n\n\n",
+        "no newline at all",
+        "trailing newline\n",
+        "```\nunclosed code block\n",
+        "  leading spaces\n\n\n\n\nafter a blank run   ",
+    ])
+    def test_edge_cases(self, text):
+        assert _stream(list(text)) == strip_markdown(text)
+        assert _stream([text]) == strip_markdown(text)
+
+    def test_output_arrives_line_by_line(self):
+        stripper = MarkdownStreamStripper()
+        assert stripper.feed("## Head") == ""
+        assert stripper.feed("ing\n**bold") == "Heading"
+        assert stripper.feed("** text") == ""
+        assert stripper.flush() == "\nbold text"
+
+
+# ---------------------------------------------------------------------------
+# Fenced JSON extraction
+# ---------------------------------------------------------------------------
+
+class TestExtractCodeBlock:
+    def test_json_fence(self):
+        assert extract_code_block('```json\n{"a": 1}\n```') == '{"a": 1}'
+
+    def test_fence_without_language_tag(self):
+        assert extract_code_block('```\n{"a": 1}\n```') == '{"a": 1}'
+
+    def test_prose_around_fence(self):
+        text = 'Here is the analysis:\n```json\n{"a": 1}\n```\nStay safe.'
+        assert extract_code_block(text) == '{"a": 1}'
+
+    def test_unfenced_text_unchanged(self):
+        assert extract_code_block('{"a": 1}') == '{"a": 1}'
+
+    def test_backticks_inside_json_string(self):
+        body = '{\n  "reply": "Run ```inhaler --check``` daily",\n  "urgency": "routine"\n}'
+        assert extract_code_block(f"```json\n{body}\n```") == body
+        assert json.loads(extract_code_block(f"```json\n{body}\n```"))["urgency"] == "routine"
+
+    def test_fence_line_inside_json_string(self):
+        body = '{\n  "reply": "example:\\n```\\ncode\\n```",\n  "urgency": "routine"\n}'
+        assert extract_code_block(f"```json\n{body}\n```") == body
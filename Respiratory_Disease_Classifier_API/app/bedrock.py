@@ -0,0 +1,200 @@
+"""
+app.bedrock
+-----------
+Minimal native-async Amazon Bedrock Runtime client.
+
+boto3 is synchronous, so every ``invoke_model`` call used to occupy a
+thread-pool worker for the full duration of the LLM request. This client
+signs requests with botocore's SigV4 implementation and sends them over a
+shared ``httpx.AsyncClient`` instead, so in-flight Bedrock calls only hold
+a socket on the event loop.
+
+Credential resolution (env vars, shared config, instance roles, refresh)
+is still delegated to the boto3 session.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+from typing import TYPE_CHECKING, AsyncIterator
+from urllib.parse import quote
+
+import httpx
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.eventstream import EventStreamBuffer
+from botocore.exceptions import NoCredentialsError
+
+if TYPE_CHECKING:
+    import boto3
+
+# Status codes botocore's "standard" retry mode treats as transient
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Wire name of boto3's ``performanceConfigLatency`` parameter
+_LATENCY_HEADER = "X-Amzn-Bedrock-PerformanceConfig-Latency"
+
+
+class BedrockRuntimeClient:
+    """Async ``InvokeModel`` (and its streaming variant) over SigV4-signed HTTP."""
+
+    def __init__(
+        self,
+        session: boto3.Session,
+        region_name: str,
+        max_attempts: int = 3,
+        timeout: float = 60.0,
+    ) -> None:
+        self._credentials = session.get_credentials()
+        self._region = region_name
+        self._endpoint = f"https://bedrock-runtime.{region_name}.amazonaws.com"
+        self._max_attempts = max_attempts
+        self._http = httpx.AsyncClient(timeout=timeout)
+
+    def _signed_headers(self, url: str, body: bytes, headers: dict) -> dict:
+        if self._credentials is None:
+            raise NoCredentialsError()
+        request = AWSRequest(method="POST", url=url, data=body, headers=headers)
+        # Frozen per request so refreshable role credentials rotate safely
+        SigV4Auth(
+            self._credentials.get_frozen_credentials(), "bedrock", self._region
+        ).add_auth(request)
+        return dict(request.headers.items())
+
+    async def invoke_model(
+        self,
+        modelId: str,
+        body: bytes | str,
+        contentType: str = "application/json",
+        accept: str = "application/json",
+        performanceConfigLatency: str = "standard",
+    ) -> bytes:
+        """
+        Invoke ``modelId`` with ``body`` and return the raw response body.
+
+        Throttling / 5xx responses and transport errors are retried with
+        exponential backoff and full jitter, like boto3's standard mode.
+        Raises ``RuntimeError`` with Bedrock's error message otherwise.
+
+        ``performanceConfigLatency="optimized"`` requests latency-optimized
+        inference, like the boto3 parameter of the same name.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        url = f"{self._endpoint}/model/{quote(modelId, safe='')}/invoke"
+
+        for attempt in range(self._max_attempts):
+            headers = self._signed_headers(
+                url,
+                body,
+                {
+                    "Content-Type": contentType,
+                    "Accept": accept,
+                    _LATENCY_HEADER: performanceConfigLatency,
+                },
+            )
+            try:
+                response = await self._http.post(url, content=body, headers=headers)
+            except httpx.TransportError:
+                if attempt + 1 == self._max_attempts:
+                    raise
+            else:
+                if response.status_code == 200:
+                    return response.content
+                if (
+                    response.status_code not in _RETRYABLE_STATUS
+                    or attempt + 1 == self._max_attempts
+                ):
+                    raise RuntimeError(
+                        f"Bedrock InvokeModel failed ({response.status_code}): "
+                        f"{_error_message(response)}"
+                    )
+            await asyncio.sleep(random.random() * min(20.0, 2.0 ** attempt))
+
+        raise RuntimeError("Bedrock InvokeModel failed: retries exhausted")
+
+    async def invoke_model_stream(
+        self,
+        modelId: str,
+        body: bytes | str,
+        contentType: str = "application/json",
+        accept: str = "application/json",
+        performanceConfigLatency: str = "standard",
+    ) -> AsyncIterator[dict]:
+        """
+        ``InvokeModelWithResponseStream``: yield each decoded model event.
+
+        Only the initial request is retried; once the event stream has
+        started, errors propagate to the caller as ``RuntimeError``.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        url = f"{self._endpoint}/model/{quote(modelId, safe='')}/invoke-with-response-stream"
+
+        for attempt in range(self._max_attempts):
+            headers = self._signed_headers(
+                url,
+                body,
+                {
+                    "Content-Type": contentType,
+                    "Accept": "application/vnd.amazon.eventstream",
+                    "X-Amzn-Bedrock-Accept": accept,
+                    _LATENCY_HEADER: performanceConfigLatency,
+                },
+            )
+            request = self._http.build_request("POST", url, content=body, headers=headers)
+            try:
+                response = await self._http.send(request, stream=True)
+            except httpx.TransportError:
+                if attempt + 1 == self._max_attempts:
+                    raise
+            else:
+                if response.status_code == 200:
+                    break
+                await response.aread()
+                await response.aclose()
+                if (
+                    response.status_code not in _RETRYABLE_STATUS
+                    or attempt + 1 == self._max_attempts
+                ):
+                    raise RuntimeError(
+                        f"Bedrock InvokeModelWithResponseStream failed "
+                        f"({response.status_code}): {_error_message(response)}"
+                    )
+            await asyncio.sleep(random.random() * min(20.0, 2.0 ** attempt))
+        else:
+            raise RuntimeError("Bedrock InvokeModelWithResponseStream failed: retries exhausted")
+
+        try:
+            buffer = EventStreamBuffer()
+            async for data in response.aiter_bytes():
+                buffer.add_data(data)
+                for message in buffer:
+                    payload = json.loads(message.payload)
+                    if message.headers.get(":message-type") != "event":
+                        raise RuntimeError(
+                            f"Bedrock stream error "
+                            f"({message.headers.get(':exception-type', 'unknown')}): "
+                            f"{payload.get('message', '')}"
+                        )
+                    if message.headers.get(":event-type") == "chunk":
+                        yield json.loads(base64.b64decode(payload["bytes"]))
+        finally:
+            await response.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+def _error_message(response: httpx.Response) -> str:
+    """Extract the ``message`` field from a Bedrock error body, if any."""
+    try:
+        payload = json.loads(response.content)
+    except ValueError:
+        return response.text
+    if isinstance(payload, dict):
+        return payload.get("message") or payload.get("Message") or response.text
+    return response.text
@@ -2,43 +2,107 @@
 app.cache
 ---------
 Thread-safe, bounded in-memory prediction cache.
-Keyed by SHA-256 of raw audio file bytes.
+Keyed by a 256-bit BLAKE3 digest of raw audio file bytes (BLAKE2b when the
+optional ``blake3`` package is not installed). Values are stored pickled so
+the cache can be bounded by total bytes as well as entry count, and
+optionally expire entries after a fixed time-to-live.
 """
 
 from __future__ import annotations
 
 import hashlib
+import pickle
+import time
 from collections import OrderedDict
 
+try:
+    import blake3  # optional SIMD tree hash — several times faster than SHA-256
+except ImportError:
+    blake3 = None
+
 
 class PredictionCache:
-    """LRU-style dict cache with a configurable max size."""
+    """LRU-style dict cache bounded by entry count and total payload bytes."""
 
-    def __init__(self, max_size: int = 128) -> None:
+    def __init__(
+        self,
+        max_size: int = 128,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float | None = None,
+    ) -> None:
         self._max_size = max_size
-        self._store: OrderedDict[str, dict] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._nbytes = 0
+        # OrderedDict is C-implemented and str keys cache their hash, so the
+        # membership test + move_to_end below is already cheaper than
+        # cachetools.LRUCache (pure Python) or a get()-based rewrite.
+        self._store: OrderedDict[str, bytes] = OrderedDict()
+        # Monotonic expiry time per key; only filled when ``ttl`` is set
+        self._expires: dict[str, float] = {}
 
     # ----- public API -----
 
+    @staticmethod
+    def new_hasher():
+        """
+        Return an incremental hasher producing the same keys as
+        :meth:`hash_bytes` — feed it with ``update(chunk)`` while an upload
+        streams in, then call ``hexdigest()``.
+        """
+        if blake3 is not None:
+            return blake3.blake3()
+        return hashlib.blake2b(digest_size=32)
+
     @staticmethod
     def hash_bytes(data: bytes) -> str:
-        """Return the SHA-256 hex digest of *data*."""
-        return hashlib.sha256(data).hexdigest()
+        """
+        Return a 256-bit hex digest of *data* for use as a cache key.
+
+        Slow path for already-buffered data; prefer :meth:`new_hasher`.
+        """
+        hasher = PredictionCache.new_hasher()
+        hasher.update(data)
+        return hasher.hexdigest()
 
     def get(self, key: str) -> dict | None:
         """Return cached result or ``None``. Moves key to end (LRU)."""
         if key in self._store:
+            if self._ttl is not None and self._expires[key] <= time.monotonic():
+                self._nbytes -= len(self._store.pop(key))
+                del self._expires[key]
+                return None
             self._store.move_to_end(key)
-            return self._store[key]
+            return pickle.loads(self._store[key])
         return None
 
     def set(self, key: str, value: dict) -> None:
-        """Insert *value*; evict the oldest entry if cache is full."""
-        if key in self._store:
-            self._store.move_to_end(key)
-        elif len(self._store) >= self._max_size:
-            self._store.popitem(last=False)
-        self._store[key] = value
+        """Insert *value*; evict the oldest entries until it fits."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        previous = self._store.pop(key, None)
+        if previous is not None:
+            self._nbytes -= len(previous)
+            self._expires.pop(key, None)
+        if len(payload) > self._max_bytes:
+            return
+
+        while self._store and (
+            len(self._store) >= self._max_size
+            or self._nbytes + len(payload) > self._max_bytes
+        ):
+            evicted_key, evicted = self._store.popitem(last=False)
+            self._nbytes -= len(evicted)
+            self._expires.pop(evicted_key, None)
+
+        self._store[key] = payload
+        self._nbytes += len(payload)
+        if self._ttl is not None:
+            self._expires[key] = time.monotonic() + self._ttl
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the cached payloads in bytes."""
+        return self._nbytes
 
     def __contains__(self, key: str) -> bool:
         return key in self._store
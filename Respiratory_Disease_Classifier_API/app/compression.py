@@ -0,0 +1,78 @@
+"""
+app.compression
+---------------
+Request-body decompression.
+
+Responses are gzip-compressed by Starlette's ``GZipMiddleware`` (see
+``main.py``). This module handles the other direction: clients on slow
+links may gzip large uploads (e.g. WAV recordings) and send them with
+``Content-Encoding: gzip``. The body is inflated chunk by chunk as the
+route reads it, so form / JSON parsing downstream is unchanged.
+"""
+
+from __future__ import annotations
+
+import zlib
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bound on an inflated body — guards against decompression bombs
+_MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+
+_STRIPPED_HEADERS = frozenset({b"content-encoding", b"content-length"})
+
+
+class GZipRequestMiddleware:
+    """Inflate request bodies sent with ``Content-Encoding: gzip``."""
+
+    def __init__(self, app: ASGIApp, max_size: int = _MAX_DECOMPRESSED_BYTES) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or Headers(scope=scope).get("content-encoding", "").lower() != "gzip"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # Downstream parsers must see a plain body of unknown length. The scope
+        # is updated in place: outer middleware reads the matched route from it.
+        scope["headers"] = [
+            (key, value) for key, value in scope["headers"] if key not in _STRIPPED_HEADERS
+        ]
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        size = 0
+
+        async def inflating_receive() -> Message:
+            # Errors raised here surface in the route's body parsing, which
+            # FastAPI reports as a 400
+            nonlocal size
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+
+            # Every inflate call is capped one byte past the limit, so a
+            # bomb is rejected after ``max_size`` bytes, not fully expanded
+            remaining = self.max_size - size
+            body = decompressor.decompress(message.get("body", b""), remaining + 1)
+            while decompressor.unconsumed_tail and len(body) <= remaining:
+                body += decompressor.decompress(
+                    decompressor.unconsumed_tail, remaining + 1 - len(body)
+                )
+            if len(body) > remaining:
+                raise ValueError("Decompressed request body is too large")
+            if not message.get("more_body", False):
+                # All input is consumed at this point; flush() only finishes
+                # the stream and cannot inflate past the limit
+                body += decompressor.flush()
+                if len(body) > remaining:
+                    raise ValueError("Decompressed request body is too large")
+                if not decompressor.eof:
+                    raise ValueError("Truncated gzip request body")
+            size += len(body)
+            return {**message, "body": body}
+
+        await self.app(scope, inflating_receive, send)
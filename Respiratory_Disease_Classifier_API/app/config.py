@@ -18,19 +18,34 @@ class Settings(BaseSettings):
     model_path: str = os.path.join(
         os.path.dirname(os.path.dirname(__file__)), "respiratory_classifier_nocopd.pkl"
     )
+    # Run a synthetic clip through the pipeline at startup (JIT + filterbanks)
+    model_warmup: bool = True
 
     # --- Cache ---
     cache_max_size: int = 128
+    cache_max_bytes: int = 64 * 1024 * 1024
+    llm_cache_max_size: int = 256
+    llm_cache_max_bytes: int = 16 * 1024 * 1024
+    llm_cache_ttl_seconds: int = 3600
 
     # --- AI Provider ---
     # Options: "bedrock" or "groq"
     ai_provider: str = "bedrock"
+    # Per-request network timeout and total attempts (first try + retries)
+    llm_timeout_seconds: float = 60.0
+    llm_max_attempts: int = 3
+    # Hard cap on one invoke_llm call, retries and backoff included
+    llm_deadline_seconds: float = 150.0
 
     # --- Amazon Bedrock ---
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
     aws_region_name: str = "us-east-1"
     bedrock_model_id: str = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+    # Mark system prompts as a prompt-cache prefix (model must support it)
+    bedrock_prompt_caching: bool = False
+    # Latency-optimized inference (supported models / regions only)
+    bedrock_latency_optimized: bool = False
 
     # --- Groq ---
     groq_api_key: str = ""
@@ -7,59 +7,107 @@ Exposes shared state via ``app.state``.
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+from typing import AsyncIterator
 
+import anyio
 import joblib
-from groq import AsyncGroq
-import boto3
-import json
-import asyncio
-from botocore.config import Config
+import numpy as np
+import orjson
+from fastapi import FastAPI, Request
 
 # ... existing imports ...
 from app.cache import PredictionCache
 from app.config import get_settings
-from model_utils import create_respiratory_pipeline
+from model_utils import AudioTrimmer, create_respiratory_pipeline
 
 logger = logging.getLogger("uvicorn.error")
 
 
+def _warm_up(model, pipeline) -> None:
+    """
+    Classify one synthetic clip so the first real request doesn't pay for
+    numba compilation, filterbank construction and the forest's first call.
+    """
+    sr = 22050  # the rate AudioLoader resamples to
+    noise = np.random.default_rng(0).standard_normal(int(AudioTrimmer.TARGET_DURATION * sr))
+    clip = {"warmup": {"data": (0.1 * noise).astype(np.float32), "sample_rate": sr}}
+    # Decoding has no one-off cost worth paying here; start at the trimmer
+    model.predict_proba(pipeline[1:].transform(clip))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup / shutdown logic (replaces deprecated ``on_event``)."""
     settings = get_settings()
 
     # --- startup ---
-    if not __import__("os").path.exists(settings.model_path):
+    if not os.path.exists(settings.model_path):
         raise FileNotFoundError(
             f"Model file not found at '{settings.model_path}'. "
             f"Make sure {os.path.basename(settings.model_path)} is in the project root."
         )
 
-    app.state.model = joblib.load(settings.model_path)
+    # Map the estimator's arrays read-only from disk so uvicorn workers share
+    # the page cache instead of each holding a private copy
+    app.state.model = joblib.load(settings.model_path, mmap_mode="r")
+    app.state.classes_body = orjson.dumps({"classes": app.state.model.classes_.tolist()})
+    # Transformers are stateless and report themselves fitted — no fit() needed
     app.state.pipeline = create_respiratory_pipeline()
-    app.state.pipeline.fit([])  # mark stateless transformers as fitted
-    app.state.cache = PredictionCache(max_size=settings.cache_max_size)
+    if settings.model_warmup:
+        await asyncio.to_thread(_warm_up, app.state.model, app.state.pipeline)
+    # Classifications running at once: more threads than cores only adds
+    # contention, and leaves the shared thread pool free for file I/O
+    app.state.inference_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+    app.state.cache = PredictionCache(
+        max_size=settings.cache_max_size,
+        max_bytes=settings.cache_max_bytes,
+    )
+    # Completed LLM replies, keyed by a digest of the full request
+    app.state.llm_cache = PredictionCache(
+        max_size=settings.llm_cache_max_size,
+        max_bytes=settings.llm_cache_max_bytes,
+        ttl=settings.llm_cache_ttl_seconds,
+    )
+    # Provider calls currently running, keyed like llm_cache
+    app.state.llm_inflight = {}
     
     # --- AI Factory ---
     provider = settings.ai_provider.lower()
     app.state.ai_provider = provider
 
+    # Provider SDKs are imported on demand: each costs 100+ ms at startup and
+    # a deployment only ever talks to one of them
     if provider == "bedrock":
-        boto_config = Config(
-            region_name=settings.aws_region_name,
-            retries={'max_attempts': 3, 'mode': 'standard'}
-        )
+        import boto3
+
+        from app.bedrock import BedrockRuntimeClient
+
         session = boto3.Session(
             aws_access_key_id=settings.aws_access_key_id or None,
             aws_secret_access_key=settings.aws_secret_access_key or None,
         )
-        app.state.ai_client = session.client('bedrock-runtime', config=boto_config)
+        # Native async client — no thread-pool worker is held per LLM call
+        app.state.ai_client = BedrockRuntimeClient(
+            session,
+            region_name=settings.aws_region_name,
+            max_attempts=settings.llm_max_attempts,
+            timeout=settings.llm_timeout_seconds,
+        )
         app.state.ai_model = settings.bedrock_model_id
         logger.info("✅  AI Provider: Amazon Bedrock (%s)", settings.bedrock_model_id)
     elif provider == "groq":
-        app.state.ai_client = AsyncGroq(api_key=settings.groq_api_key or None)
+        from groq import AsyncGroq
+
+        app.state.ai_client = AsyncGroq(
+            api_key=settings.groq_api_key or None,
+            timeout=settings.llm_timeout_seconds,
+            max_retries=settings.llm_max_attempts - 1,
+        )
         app.state.ai_model = settings.groq_model
         logger.info("✅  AI Provider: Groq (%s)", settings.groq_model)
     else:
@@ -71,6 +119,8 @@ async def lifespan(app: FastAPI):
     yield  # app runs here
 
     # --- shutdown ---
+    if provider == "bedrock":
+        await app.state.ai_client.aclose()
     logger.info("👋  Shutting down")
 
 
@@ -90,6 +140,10 @@ def get_cache(request: Request) -> PredictionCache:
     return request.app.state.cache
 
 
+# Replies sampled above this temperature are meant to vary, so never reuse them
+_LLM_CACHE_MAX_TEMPERATURE = 0.7
+
+
 async def invoke_llm(
     request: Request,
     system_prompt: str,
@@ -103,92 +157,312 @@ async def invoke_llm(
     
     Accepts messages in a simple format:
     [{ "role": "user", "content": "text" | [{"type": "text", "text": "..."}, {"type": "image", "data": "base64", "mime": "image/jpeg"}] }]
+
+    ``{"type": "document", "data": "base64", "mime": "application/pdf"}``
+    parts are passed to Bedrock as PDF document blocks (Bedrock only).
+
+    Identical requests are answered from ``app.state.llm_cache``; a cached
+    reply reports zero token usage since no tokens were spent on it.
+    Identical requests that arrive while the first is still in flight
+    share its provider call instead of starting their own.
+
+    The provider call, retries included, is cut off after
+    ``settings.llm_deadline_seconds`` with ``TimeoutError``; routes map
+    that to a 504.
     """
+    model = request.app.state.ai_model
+    body = None
+    if request.app.state.ai_provider == "bedrock":
+        # Serialize once — the request body doubles as the cache-key input,
+        # so multi-MB image payloads are not encoded a second time
+        body = _bedrock_body(
+            system_prompt,
+            messages,
+            temperature,
+            max_tokens,
+            cache_system=request.app.state.settings.bedrock_prompt_caching,
+        )
+
+    deadline = request.app.state.settings.llm_deadline_seconds
+    if temperature > _LLM_CACHE_MAX_TEMPERATURE:
+        async with asyncio.timeout(deadline):
+            return await _invoke_provider(
+                request, model, system_prompt, messages, temperature, max_tokens, body
+            )
+
+    cache = request.app.state.llm_cache
+    key = _llm_cache_key(cache, model, system_prompt, messages, temperature, max_tokens, body)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached["text"], {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+        }
+
+    inflight = request.app.state.llm_inflight
+    task = inflight.get(key)
+    if task is not None:
+        text, _ = await asyncio.shield(task)
+        return text, {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+        }
+
+    async def invoke_and_cache():
+        async with asyncio.timeout(deadline):
+            text, usage = await _invoke_provider(
+                request, model, system_prompt, messages, temperature, max_tokens, body
+            )
+        cache.set(key, {"text": text})
+        return text, usage
+
+    # Shielded so a disconnecting first caller does not cancel the call for
+    # everyone waiting on it
+    task = asyncio.ensure_future(invoke_and_cache())
+    inflight[key] = task
+    task.add_done_callback(partial(_finish_inflight, inflight, key))
+    return await asyncio.shield(task)
+
+
+def _finish_inflight(inflight: dict, key: str, task: asyncio.Task) -> None:
+    inflight.pop(key, None)
+    # Mark the error as retrieved even if every waiter has gone away
+    if not task.cancelled():
+        task.exception()
+
+
+async def invoke_llm_stream(
+    request: Request,
+    system_prompt: str,
+    messages: list[dict],
+    temperature: float = 0.4,
+    max_tokens: int = 4096,
+    usage: dict | None = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of :func:`invoke_llm`: yield the reply as text deltas.
+
+    Generators cannot return a value, so token usage is written into the
+    caller-supplied ``usage`` dict once the stream has finished. Replies
+    share ``app.state.llm_cache`` with :func:`invoke_llm`; a cache hit is
+    yielded as a single delta.
+    """
+    if usage is None:
+        usage = {}
+    usage.update(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+
+    model = request.app.state.ai_model
     provider = request.app.state.ai_provider
     client = request.app.state.ai_client
-    model = request.app.state.ai_model
-    
+    body = None
     if provider == "bedrock":
-        # --- Map to Bedrock/Claude Format ---
-        bedrock_messages = []
-        for msg in messages:
-            content = msg["content"]
-            if isinstance(content, list):
-                # Multimodal
-                mapped_content = []
-                for item in content:
-                    if item["type"] == "text":
-                        mapped_content.append({"type": "text", "text": item["text"]})
-                    elif item["type"] == "image":
-                        # Convert common image format to Bedrock format
-                        mapped_content.append({
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": item["mime"],
-                                "data": item["data"]
-                            }
-                        })
-                bedrock_messages.append({"role": msg["role"], "content": mapped_content})
-            else:
-                # Simple text
-                bedrock_messages.append({"role": msg["role"], "content": content})
-
-        body = json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "system": system_prompt,
-            "messages": bedrock_messages,
-            "temperature": temperature,
-        })
-
-        def _invoke():
-            return client.invoke_model(
-                modelId=model,
-                body=body,
-                contentType="application/json",
-                accept="application/json",
-            )
+        body = _bedrock_body(
+            system_prompt,
+            messages,
+            temperature,
+            max_tokens,
+            cache_system=request.app.state.settings.bedrock_prompt_caching,
+        )
+
+    cache = key = None
+    if temperature <= _LLM_CACHE_MAX_TEMPERATURE:
+        cache = request.app.state.llm_cache
+        key = _llm_cache_key(cache, model, system_prompt, messages, temperature, max_tokens, body)
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached["text"]
+            return
+
+    parts = []
+    if provider == "bedrock":
+        stream = client.invoke_model_stream(
+            modelId=model,
+            body=body,
+            contentType="application/json",
+            accept="application/json",
+            performanceConfigLatency=_bedrock_latency(request),
+        )
+        async for event in stream:
+            if event["type"] == "content_block_delta":
+                text = event["delta"].get("text")
+                if text:
+                    parts.append(text)
+                    yield text
+            elif event["type"] == "message_start":
+                start_usage = event["message"].get("usage", {})
+                usage["prompt_tokens"] = (
+                    start_usage.get("input_tokens", 0)
+                    + start_usage.get("cache_read_input_tokens", 0)
+                    + start_usage.get("cache_creation_input_tokens", 0)
+                )
+            elif event["type"] == "message_delta":
+                usage["completion_tokens"] = event.get("usage", {}).get("output_tokens", 0)
+
+    elif provider == "groq":
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=_groq_messages(system_prompt, messages),
+            temperature=temperature,
+            max_completion_tokens=max_tokens,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            # Groq reports usage on the final chunk
+            if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                usage["prompt_tokens"] = chunk.x_groq.usage.prompt_tokens
+                usage["completion_tokens"] = chunk.x_groq.usage.completion_tokens
+
+    else:
+        yield "No provider configured"
+        return
+
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    if cache is not None:
+        cache.set(key, {"text": "".join(parts)})
+
+
+def _llm_cache_key(
+    cache: PredictionCache,
+    model: str,
+    system_prompt: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    body: bytes | None,
+) -> str:
+    hasher = cache.new_hasher()
+    hasher.update(model.encode("utf-8") + b"\0")
+    hasher.update(
+        body
+        if body is not None
+        else orjson.dumps([system_prompt, messages, temperature, max_tokens])
+    )
+    return hasher.hexdigest()
+
+
+def _bedrock_latency(request: Request) -> str:
+    return "optimized" if request.app.state.settings.bedrock_latency_optimized else "standard"
+
 
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(None, _invoke)
-        resp_body = json.loads(response.get("body").read())
+# Every Bedrock body starts with the same API version field
+_BEDROCK_BODY_PREFIX = b'{"anthropic_version":"bedrock-2023-05-31","system":'
+
+
+@lru_cache(maxsize=32)
+def _encode_system(system_prompt: str, cache_system: bool) -> bytes:
+    """JSON-encode a system prompt once — routers reuse a few constant prompts."""
+    if cache_system:
+        # Prompt-cache checkpoint after the static system prompt; the
+        # per-patient messages that follow are never part of the cached prefix
+        return orjson.dumps([
+            {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+        ])
+    return orjson.dumps(system_prompt)
+
+
+def _bedrock_body(
+    system_prompt: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    cache_system: bool = False,
+) -> bytes:
+    """Map messages to the Bedrock/Claude format and serialize the request."""
+    bedrock_messages = []
+    for msg in messages:
+        content = msg["content"]
+        if isinstance(content, list):
+            # Multimodal
+            mapped_content = []
+            for item in content:
+                if item["type"] == "text":
+                    mapped_content.append({"type": "text", "text": item["text"]})
+                elif item["type"] == "image":
+                    # Convert common image format to Bedrock format
+                    mapped_content.append({
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": item["mime"],
+                            "data": item["data"]
+                        }
+                    })
+                elif item["type"] == "document":
+                    mapped_content.append({
+                        "type": "document",
+                        "source": {
+                            "type": "base64",
+                            "media_type": item["mime"],
+                            "data": item["data"]
+                        }
+                    })
+            bedrock_messages.append({"role": msg["role"], "content": mapped_content})
+        else:
+            # Simple text
+            bedrock_messages.append({"role": msg["role"], "content": content})
+
+    # orjson returns UTF-8 bytes, which the Bedrock client sends as-is. Only
+    # the per-call fields are encoded here; the constant prefix and the
+    # (cached) system prompt are spliced in front of the object's "{".
+    tail = orjson.dumps({
+        "max_tokens": max_tokens,
+        "messages": bedrock_messages,
+        "temperature": temperature,
+    })
+    return b"".join(
+        (_BEDROCK_BODY_PREFIX, _encode_system(system_prompt, cache_system), b",", tail[1:])
+    )
+
+
+async def _invoke_provider(
+    request: Request,
+    model: str,
+    system_prompt: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    body: bytes | None,
+):
+    """Send one request to the configured provider (no caching)."""
+    provider = request.app.state.ai_provider
+    client = request.app.state.ai_client
+
+    if provider == "bedrock":
+        raw = await client.invoke_model(
+            modelId=model,
+            body=body,
+            contentType="application/json",
+            accept="application/json",
+            performanceConfigLatency=_bedrock_latency(request),
+        )
+        resp_body = orjson.loads(raw)
         
         usage = resp_body.get("usage", {})
+        # With prompt caching, cached / newly cached prefix tokens are
+        # reported separately from input_tokens
+        prompt_tokens = (
+            usage.get("input_tokens", 0)
+            + usage.get("cache_read_input_tokens", 0)
+            + usage.get("cache_creation_input_tokens", 0)
+        )
         return (
             resp_body["content"][0]["text"],
             {
-                "prompt_tokens": usage.get("input_tokens", 0),
+                "prompt_tokens": prompt_tokens,
                 "completion_tokens": usage.get("output_tokens", 0),
-                "total_tokens": usage.get("input_tokens", 0) + usage.get("output_tokens", 0),
+                "total_tokens": prompt_tokens + usage.get("output_tokens", 0),
             }
         )
 
     elif provider == "groq":
-        # --- Map to Groq/OpenAI Format ---
-        groq_messages = [{"role": "system", "content": system_prompt}]
-        for msg in messages:
-            content = msg["content"]
-            if isinstance(content, list):
-                # Multimodal mapping
-                mapped_content = []
-                for item in content:
-                    if item["type"] == "text":
-                        mapped_content.append({"type": "text", "text": item["text"]})
-                    elif item["type"] == "image":
-                        # Convert to data URI for Groq
-                        uri = f"data:{item['mime']};base64,{item['data']}"
-                        mapped_content.append({
-                            "type": "image_url",
-                            "image_url": {"url": uri}
-                        })
-                groq_messages.append({"role": msg["role"], "content": mapped_content})
-            else:
-                groq_messages.append({"role": msg["role"], "content": content})
-
         response = await client.chat.completions.create(
             model=model,
-            messages=groq_messages,
+            messages=_groq_messages(system_prompt, messages),
             temperature=temperature,
             max_completion_tokens=max_tokens,
         )
@@ -204,3 +478,27 @@ async def invoke_llm(
         )
 
     return "No provider configured", {}
+
+
+def _groq_messages(system_prompt: str, messages: list[dict]) -> list[dict]:
+    """Map messages to the Groq/OpenAI chat format."""
+    groq_messages = [{"role": "system", "content": system_prompt}]
+    for msg in messages:
+        content = msg["content"]
+        if isinstance(content, list):
+            # Multimodal mapping
+            mapped_content = []
+            for item in content:
+                if item["type"] == "text":
+                    mapped_content.append({"type": "text", "text": item["text"]})
+                elif item["type"] == "image":
+                    # Convert to data URI for Groq
+                    uri = f"data:{item['mime']};base64,{item['data']}"
+                    mapped_content.append({
+                        "type": "image_url",
+                        "image_url": {"url": uri}
+                    })
+            groq_messages.append({"role": msg["role"], "content": mapped_content})
+        else:
+            groq_messages.append({"role": msg["role"], "content": content})
+    return groq_messages
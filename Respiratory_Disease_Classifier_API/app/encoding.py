@@ -0,0 +1,26 @@
+"""
+app.encoding
+------------
+Wire encodings shared by the routers: base64 for images sent to vision
+models, and Server-Sent Events for the streaming endpoints.
+"""
+
+from __future__ import annotations
+
+import base64
+
+import orjson
+
+try:
+    # Optional SIMD base64 that builds the str directly — the stdlib path
+    # spends as long on bytes.decode() as on the encode itself
+    from pybase64 import b64encode_as_string as b64encode
+except ImportError:
+    def b64encode(data: bytes) -> str:
+        """Standard base64 of ``data`` as an ASCII ``str``."""
+        return base64.b64encode(data).decode("ascii")
+
+
+def sse_event(event: str, data: dict) -> bytes:
+    """Encode one Server-Sent Event (orjson escapes newlines, so one data line)."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
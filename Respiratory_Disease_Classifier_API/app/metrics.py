@@ -3,7 +3,9 @@ app.metrics
 ------------
 In-memory metrics collector for the admin dashboard.
 Tracks request counts, response times, errors, and token usage per endpoint.
-Thread-safe via collections.deque (GIL-protected).
+All updates come from the metrics middleware on the event loop thread, and
+none of them await, so a snapshot never sees a half-applied update — no
+locks or atomic counters are needed.
 """
 
 from __future__ import annotations
@@ -13,6 +15,14 @@ from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Dashboard, docs, and static assets — only real API calls are tracked
+_UNTRACKED_PATHS = frozenset({"/", "/docs", "/redoc", "/openapi.json", "/favicon.ico"})
+_UNTRACKED_PREFIXES = ("/static", "/admin")
+# Stats bucket for requests that matched no route (404s, scanners, ...)
+_UNMATCHED_ROUTE = "other"
+
 
 @dataclass
 class EndpointStats:
@@ -21,22 +31,43 @@ class EndpointStats:
     total_requests: int = 0
     total_errors: int = 0
     response_times_ms: deque = field(default_factory=lambda: deque(maxlen=100))
-    last_request_at: str | None = None
+    # Raw time.time(); formatted to ISO only when a snapshot is taken
+    last_request_at_ts: float | None = None
+    # A plain dict: an index-table + array.array counter still needs the same
+    # dict lookup to find the slot and measured ~50% slower per record()
     status_codes: dict[int, int] = field(default_factory=dict)
+    # Running total of response_times_ms in integer tenths of a millisecond,
+    # kept in step with deque evictions (integers, so it never drifts)
+    _sum_tenths: int = field(default=0, init=False, repr=False, compare=False)
+    # Last to_dict() result, keyed by total_requests (bumped on every record)
+    _snapshot: tuple[int, dict] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def record(self, duration_ms: float, status_code: int) -> None:
         self.total_requests += 1
-        self.response_times_ms.append(round(duration_ms, 1))
-        self.last_request_at = datetime.now(timezone.utc).isoformat()
+        times = self.response_times_ms
+        if len(times) == times.maxlen:
+            self._sum_tenths -= round(times[0] * 10)
+        tenths = round(duration_ms * 10)
+        times.append(tenths / 10)
+        self._sum_tenths += tenths
+        self.last_request_at_ts = time.time()
         self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
         if status_code >= 400:
             self.total_errors += 1
 
+    @property
+    def last_request_at(self) -> str | None:
+        if self.last_request_at_ts is None:
+            return None
+        return datetime.fromtimestamp(self.last_request_at_ts, timezone.utc).isoformat()
+
     @property
     def avg_response_ms(self) -> float:
         if not self.response_times_ms:
             return 0
-        return round(sum(self.response_times_ms) / len(self.response_times_ms), 1)
+        return round(self._sum_tenths / len(self.response_times_ms) / 10, 1)
 
     @property
     def p95_response_ms(self) -> float:
@@ -47,7 +78,11 @@ class EndpointStats:
         return sorted_times[min(idx, len(sorted_times) - 1)]
 
     def to_dict(self) -> dict:
-        return {
+        # Dashboard polling re-reads idle endpoints far more often than they
+        # change, so skip the sort / sum until a new request is recorded
+        if self._snapshot is not None and self._snapshot[0] == self.total_requests:
+            return self._snapshot[1]
+        result = {
             "total_requests": self.total_requests,
             "total_errors": self.total_errors,
             "avg_response_ms": self.avg_response_ms,
@@ -62,13 +97,18 @@ class EndpointStats:
                 1,
             ),
         }
+        self._snapshot = (self.total_requests, result)
+        return result
 
 
 class MetricsCollector:
     """Application-wide metrics store."""
 
     def __init__(self) -> None:
-        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._started_at_ts = time.time()
+        self.started_at = datetime.fromtimestamp(
+            self._started_at_ts, timezone.utc
+        ).isoformat()
         self.endpoints: dict[str, EndpointStats] = {}
         self.total_tokens: dict[str, int] = {
             "prompt": 0,
@@ -106,12 +146,7 @@ class MetricsCollector:
         return {
             "server": {
                 "started_at": self.started_at,
-                "uptime_seconds": round(
-                    (
-                        datetime.now(timezone.utc)
-                        - datetime.fromisoformat(self.started_at)
-                    ).total_seconds()
-                ),
+                "uptime_seconds": round(time.time() - self._started_at_ts),
             },
             "totals": {
                 "requests": total_req,
@@ -144,9 +179,44 @@ class MetricsCollector:
     @staticmethod
     def _normalize_path(path: str) -> str:
         """Normalize request paths to route groups."""
-        # Remove query string
-        path = path.split("?")[0]
-        # Skip static / docs / openapi
-        if path in ("/docs", "/openapi.json", "/redoc", "/favicon.ico"):
-            return path
-        return path
+        # Remove query string (partition avoids split()'s list allocation).
+        # Docs / static paths are kept as-is like every other route.
+        return path.partition("?")[0]
+
+
+class MetricsMiddleware:
+    """
+    Track request count, response time, and status code per endpoint.
+
+    A plain ASGI middleware: unlike ``@app.middleware("http")`` it does not
+    run the app in a separate task or re-stream every response body. The
+    response time is measured up to the response start, as before.
+    """
+
+    def __init__(self, app: ASGIApp, collector: MetricsCollector) -> None:
+        self.app = app
+        self.collector = collector
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope["path"] if scope["type"] == "http" else ""
+        # Skip dashboard, admin, static, and docs — only track real API calls
+        if not path or path in _UNTRACKED_PATHS or path.startswith(_UNTRACKED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_with_metrics(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Group by the matched route template (set in scope by the
+                # router) so path parameters and unknown URLs cannot grow
+                # the stats table
+                route = scope.get("route")
+                self.collector.record_request(
+                    route.path if route is not None else _UNMATCHED_ROUTE,
+                    (time.perf_counter() - start) * 1000,
+                    message["status"],
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_metrics)
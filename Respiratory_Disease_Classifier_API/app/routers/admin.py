@@ -10,6 +10,23 @@ from fastapi import APIRouter, Request
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# Static endpoint registry shown on the dashboard — built once, shared by
+# every snapshot (the JSON encoder serializes the tuple as a list)
+_REGISTERED_ENDPOINTS = (
+    {"path": "/", "method": "GET", "tag": "Health"},
+    {"path": "/classes", "method": "GET", "tag": "Health"},
+    {"path": "/predict", "method": "POST", "tag": "Prediction"},
+    {"path": "/predict/batch", "method": "POST", "tag": "Prediction"},
+    {"path": "/report", "method": "POST", "tag": "Report"},
+    {"path": "/report/stream", "method": "POST", "tag": "Report"},
+    {"path": "/heart/analyze", "method": "POST", "tag": "Heart Disease"},
+    {"path": "/scan/analyze", "method": "POST", "tag": "Medical Imaging"},
+    {"path": "/scan/analyze/stream", "method": "POST", "tag": "Medical Imaging"},
+    {"path": "/lab/analyze", "method": "POST", "tag": "Lab Reports"},
+    {"path": "/symptoms/chat", "method": "POST", "tag": "Symptom Checker"},
+    {"path": "/drugs/check", "method": "POST", "tag": "Drug Interactions"},
+)
+
 
 @router.get("/metrics", summary="Get API metrics for the admin dashboard")
 async def get_metrics(request: Request):
@@ -23,21 +40,15 @@ async def get_metrics(request: Request):
         "version": "2.1.0",
         "groq_model": settings.groq_model,
         "cache_max_size": settings.cache_max_size,
+        "cache_max_bytes": settings.cache_max_bytes,
+        "llm_cache_max_size": settings.llm_cache_max_size,
+        "llm_cache_max_bytes": settings.llm_cache_max_bytes,
+        "llm_cache_ttl_seconds": settings.llm_cache_ttl_seconds,
         "model_path": settings.model_path,
         "groq_connected": bool(settings.groq_api_key),
     }
 
     # Add endpoint registry (which endpoints are registered)
-    snapshot["registered_endpoints"] = [
-        {"path": "/", "method": "GET", "tag": "Health"},
-        {"path": "/classes", "method": "GET", "tag": "Health"},
-        {"path": "/predict", "method": "POST", "tag": "Prediction"},
-        {"path": "/report", "method": "POST", "tag": "Report"},
-        {"path": "/heart/analyze", "method": "POST", "tag": "Heart Disease"},
-        {"path": "/scan/analyze", "method": "POST", "tag": "Medical Imaging"},
-        {"path": "/lab/analyze", "method": "POST", "tag": "Lab Reports"},
-        {"path": "/symptoms/chat", "method": "POST", "tag": "Symptom Checker"},
-        {"path": "/drugs/check", "method": "POST", "tag": "Drug Interactions"},
-    ]
+    snapshot["registered_endpoints"] = _REGISTERED_ENDPOINTS
 
     return snapshot
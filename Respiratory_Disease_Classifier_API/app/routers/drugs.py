@@ -8,15 +8,17 @@ and condition-specific warnings using Groq LLM.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 
+import orjson
 from fastapi import APIRouter, HTTPException, Request
 
 from app.anonymizer import anonymizer
 from app.config import get_settings
 from app.schemas import DrugCheckRequest, DrugCheckResponse
-from app.text_formatter import strip_markdown
+from app.text_formatter import extract_code_block, strip_markdown
 
 router = APIRouter(prefix="/drugs", tags=["Drug Interactions"])
 
@@ -103,6 +105,35 @@ For each medication combination, systematically evaluate:
 
 ⛕️ This is AI-generated. All drug decisions require review by a qualified pharmacist or physician."""
 
+REPORT_SYSTEM_PROMPT = (
+    "You are a clinical pharmacologist generating a comprehensive patient-friendly medication safety report in Markdown.\n\n"
+    "## Report Sections (include ALL):\n"
+    "### 1. Medication Overview\n"
+    "For each drug: what it does, why it's prescribed, how it works in simple terms.\n\n"
+    "### 2. Interaction Analysis\n"
+    "For each interaction found:\n"
+    "- Which drugs interact and severity badge (🔴 Major, 🟠 Moderate, 🟡 Minor)\n"
+    "- What could happen in plain language\n"
+    "- What to watch for (symptoms/signs)\n"
+    "- How to manage it (timing, dose adjustment, monitoring)\n\n"
+    "### 3. Safety Warnings\n"
+    "List all contraindications, black box warnings, and precautions with clear action items.\n\n"
+    "### 4. Medication Timing Guide\n"
+    "Create a simple daily schedule table:\n"
+    "| Time | Medication | With Food? | Notes |\n\n"
+    "### 5. Monitoring Checklist\n"
+    "What labs or vitals should be checked, how often, and what values to watch.\n\n"
+    "### 6. Questions for Your Doctor\n"
+    "5-7 specific, relevant questions the patient should discuss with their provider.\n\n"
+    "## OUTPUT FORMATTING — CRITICAL\n"
+    "- NEVER use LaTeX syntax (\\\\(, \\\\), \\\\[, \\\\], \\\\frac{}{}, \\\\text{}, $...$).\n"
+    "- Use plain Unicode: ≥, ≤, ±, →. Use plain text for dosages.\n"
+    "- Format as clean Markdown with headings, bullet points, **bold**, tables.\n"
+    "- Keep mobile-friendly: short paragraphs, clear section breaks.\n\n"
+    "⛕️ **Disclaimer**: This report is AI-generated for informational purposes only. "
+    "All medication decisions must be reviewed by a qualified pharmacist or physician."
+)
+
 
 # ---------------------------------------------------------------------------
 # Route
@@ -151,26 +182,34 @@ async def check_drugs(request: Request, req: DrugCheckRequest):
     user_prompt = "\n".join(context_parts)
 
     try:
-        # --- Step 1: Structured JSON analysis ---
-        raw_json_text, usage1 = await invoke_llm(
-            request, SYSTEM_PROMPT, [{"role": "user", "content": user_prompt}], temperature=0.3
+        # --- Structured JSON analysis + human-readable report ---
+        # Both only need the de-identified patient info, so the two LLM
+        # round-trips run concurrently instead of back to back
+        (raw_json_text, usage1), (report_text, usage2) = await asyncio.gather(
+            invoke_llm(
+                request, SYSTEM_PROMPT, [{"role": "user", "content": user_prompt}], temperature=0.3
+            ),
+            invoke_llm(
+                request,
+                REPORT_SYSTEM_PROMPT,
+                [
+                    {
+                        "role": "user",
+                        "content": (
+                            f"Patient info:\n{user_prompt}\n\n"
+                            "Generate the full patient report."
+                        ),
+                    }
+                ],
+                temperature=0.4,
+            ),
         )
 
         # Parse JSON
         try:
-            cleaned = raw_json_text.strip()
             # If the response contains markdown code blocks, extract content
-            if "```" in cleaned:
-                start_code = cleaned.find("```")
-                end_code = cleaned.rfind("```")
-                if start_code != -1 and end_code != -1 and end_code > start_code:
-                    code_block = cleaned[start_code:end_code+3]
-                    lines = code_block.split("\n")
-                    # Remove the fences (e.g. ```json and ```)
-                    content = "\n".join(lines[1:-1])
-                    cleaned = content
-            parsed = json.loads(cleaned)
-        except json.JSONDecodeError:
+            parsed = orjson.loads(extract_code_block(raw_json_text.strip()))
+        except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
             parsed = {
                 "interactions": [],
                 "warnings": [],
@@ -179,52 +218,6 @@ async def check_drugs(request: Request, req: DrugCheckRequest):
                 "recommendations": [],
             }
 
-        # --- Step 2: Human-readable report ---
-        report_system_prompt = (
-            "You are a clinical pharmacologist generating a comprehensive patient-friendly medication safety report in Markdown.\n\n"
-            "## Report Sections (include ALL):\n"
-            "### 1. Medication Overview\n"
-            "For each drug: what it does, why it's prescribed, how it works in simple terms.\n\n"
-            "### 2. Interaction Analysis\n"
-            "For each interaction found:\n"
-            "- Which drugs interact and severity badge (🔴 Major, 🟠 Moderate, 🟡 Minor)\n"
-            "- What could happen in plain language\n"
-            "- What to watch for (symptoms/signs)\n"
-            "- How to manage it (timing, dose adjustment, monitoring)\n\n"
-            "### 3. Safety Warnings\n"
-            "List all contraindications, black box warnings, and precautions with clear action items.\n\n"
-            "### 4. Medication Timing Guide\n"
-            "Create a simple daily schedule table:\n"
-            "| Time | Medication | With Food? | Notes |\n\n"
-            "### 5. Monitoring Checklist\n"
-            "What labs or vitals should be checked, how often, and what values to watch.\n\n"
-            "### 6. Questions for Your Doctor\n"
-            "5-7 specific, relevant questions the patient should discuss with their provider.\n\n"
-            "## OUTPUT FORMATTING — CRITICAL\n"
-            "- NEVER use LaTeX syntax (\\\\(, \\\\), \\\\[, \\\\], \\\\frac{}{}, \\\\text{}, $...$).\n"
-            "- Use plain Unicode: ≥, ≤, ±, →. Use plain text for dosages.\n"
-            "- Format as clean Markdown with headings, bullet points, **bold**, tables.\n"
-            "- Keep mobile-friendly: short paragraphs, clear section breaks.\n\n"
-            "⛕️ **Disclaimer**: This report is AI-generated for informational purposes only. "
-            "All medication decisions must be reviewed by a qualified pharmacist or physician."
-        )
-
-        report_text, usage2 = await invoke_llm(
-            request,
-            report_system_prompt,
-            [
-                {
-                    "role": "user",
-                    "content": (
-                        f"Patient info:\n{user_prompt}\n\n"
-                        f"Analysis results:\n{json.dumps(parsed, indent=2)}\n\n"
-                        "Generate the full patient report."
-                    ),
-                }
-            ],
-            temperature=0.4
-        )
-
         # Aggregate token usage
         total_tokens = {
             "prompt": usage1["prompt_tokens"] + usage2["prompt_tokens"],
@@ -242,6 +235,11 @@ async def check_drugs(request: Request, req: DrugCheckRequest):
             "tokens_used": total_tokens,
         }
 
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Drug interaction check failed: AI provider timed out",
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500,
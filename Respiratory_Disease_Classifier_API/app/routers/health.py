@@ -4,19 +4,23 @@ app.routers.health
 Health-check and model metadata endpoints.
 """
 
-from fastapi import APIRouter, Request
+import orjson
+from fastapi import APIRouter, Request, Response
 
 router = APIRouter(tags=["Health"])
 
+# Constant payload — serialized once instead of on every probe
+_HEALTH_BODY = orjson.dumps({"status": "ok", "message": "Medical AI Platform is running 🏥"})
+
 
 @router.get("/health", summary="Health check")
-def health_check():
+async def health_check():
     """Simple health-check endpoint."""
-    return {"status": "ok", "message": "Medical AI Platform is running 🏥"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @router.get("/classes", summary="List model classes")
-def list_classes(request: Request):
+async def list_classes(request: Request):
     """Return the respiratory condition labels the model can predict."""
-    model = request.app.state.model
-    return {"classes": list(model.classes_)}
+    # Serialized once in lifespan — classes_ never changes after loading
+    return Response(content=request.app.state.classes_body, media_type="application/json")
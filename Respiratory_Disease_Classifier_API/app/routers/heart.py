@@ -6,15 +6,19 @@ Heart disease risk assessment using a multi-step LLM chain:
   Step 2 — Diagnosis: condition analysis     (JSON)
   Step 3 — Report:    full patient report    (Markdown)
 
-All three steps run sequentially; each step receives the previous output.
+Triage and Diagnosis both work from the patient data alone and run
+concurrently; the Report step receives both outputs. A critical triage
+skips the Report step and returns a fixed emergency notice instead.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 
-from fastapi import APIRouter, HTTPException, Request
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
 
 from app.anonymizer import anonymizer
 from app.config import get_settings
@@ -25,6 +29,8 @@ router = APIRouter(prefix="/heart", tags=["Heart Disease"])
 
 logger = logging.getLogger("uvicorn.error")
 
+_JSON_DECODER = json.JSONDecoder()
+
 
 # ---------------------------------------------------------------------------
 # Prompts
@@ -72,7 +78,7 @@ Return ONLY valid JSON with this exact structure:
 
 DIAGNOSIS_SYSTEM = """\
 You are a senior interventional cardiologist AI with expertise in cardiac diagnostics.
-Based on the patient data AND the triage assessment, provide a detailed evidence-based diagnosis.
+Based on the patient data, provide a detailed evidence-based diagnosis.
 
 Return ONLY valid JSON with this exact structure:
 {
@@ -207,6 +213,23 @@ Clear, scannable list:
 
 ⚕️ **Disclaimer**: This report is AI-generated for informational purposes only. It is not a substitute for professional medical advice. Always consult a qualified cardiologist."""
 
+# Returned instead of the Step 3 report when triage is critical — the
+# actionable output is already decided, so the patient gets it without
+# waiting on another LLM call
+CRITICAL_REPORT = """# ⚠️ Critical Cardiac Risk — Seek Emergency Care Now
+
+The triage assessment found signs that need immediate medical attention. Do not wait for a full report.
+
+## What To Do Now
+- 🔴 Call emergency services (911) immediately.
+- 🔴 Stop all physical activity and rest while waiting for help.
+- 🔴 Do not drive yourself to the hospital.
+
+## Key Findings
+{red_flags}
+
+⚕️ **Disclaimer**: This notice is AI-generated for informational purposes only. It is not a substitute for professional medical advice. Always consult a qualified cardiologist."""
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -236,14 +259,15 @@ def _build_patient_summary(req: HeartDiseaseInput) -> str:
 
 def _parse_json_safe(text: str) -> dict:
     """Parse JSON from LLM output, handling markdown code fences."""
-    cleaned = text.strip()
-    # Strip ```json ... ``` wrapper if present
-    if cleaned.startswith("```"):
-        lines = cleaned.split("\n")
-        # Remove first line (```json) and last line (```)
-        lines = [l for l in lines if not l.strip().startswith("```")]
-        cleaned = "\n".join(lines)
-    return json.loads(cleaned)
+    # Outermost { ... } span — skips fences and any prose around the object
+    start = text.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    try:
+        return orjson.loads(text[start:text.rfind("}") + 1])
+    except orjson.JSONDecodeError:
+        # Trailing text containing "}" — decode just the first object
+        return _JSON_DECODER.raw_decode(text, start)[0]
 
 
 from app.dependencies import invoke_llm
@@ -254,7 +278,14 @@ from app.dependencies import invoke_llm
     summary="Multi-step heart disease risk analysis (Triage → Diagnosis → Report)",
     response_model=HeartAnalysisResponse,
 )
-async def analyze_heart(request: Request, req: HeartDiseaseInput):
+async def analyze_heart(
+    request: Request,
+    req: HeartDiseaseInput,
+    full_report: bool = Query(
+        False,
+        description="Generate the full report even when triage is critical",
+    ),
+):
     """
     Submit clinical data and receive a comprehensive 3-step analysis:
 
@@ -262,6 +293,9 @@ async def analyze_heart(request: Request, req: HeartDiseaseInput):
     2. **Diagnosis** — conditions, risk score, abnormal values
     3. **Report** — full Markdown patient report
 
+    When triage is critical and needs immediate action, step 3 is skipped
+    and **report** holds an emergency notice, unless ``full_report=true``.
+
     Powered by the configured AI Provider (Bedrock/Groq).
     """
     settings = get_settings()
@@ -270,40 +304,50 @@ async def analyze_heart(request: Request, req: HeartDiseaseInput):
 
     try:
         # =================================================================
-        # STEP 1 — Triage
+        # STEPS 1 + 2 — Triage and Diagnosis  (independent, run concurrently)
         # =================================================================
-        logger.info("🫀 Step 1/3: Triage")
-        triage_text, usage1 = await invoke_llm(
-            request, TRIAGE_SYSTEM,
-            [{"role": "user", "content": f"Patient clinical data:\n\n{patient_summary}"}],
+        logger.info("🫀 Steps 1-2/3: Triage + Diagnosis")
+        patient_message = [
+            {"role": "user", "content": f"Patient clinical data:\n\n{patient_summary}"}
+        ]
+        (triage_text, usage1), (diagnosis_text, usage2) = await asyncio.gather(
+            invoke_llm(request, TRIAGE_SYSTEM, patient_message),
+            invoke_llm(request, DIAGNOSIS_SYSTEM, patient_message),
         )
-        total_tokens["prompt"] += usage1["prompt_tokens"]
-        total_tokens["completion"] += usage1["completion_tokens"]
+        for usage in (usage1, usage2):
+            total_tokens["prompt"] += usage["prompt_tokens"]
+            total_tokens["completion"] += usage["completion_tokens"]
 
         try:
             triage = _parse_json_safe(triage_text)
         except json.JSONDecodeError:
             triage = {"raw_response": triage_text, "urgency": "unknown"}
 
-        # =================================================================
-        # STEP 2 — Diagnosis  (receives patient data + triage result)
-        # =================================================================
-        logger.info("🫀 Step 2/3: Diagnosis")
-        diagnosis_text, usage2 = await invoke_llm(
-            request, DIAGNOSIS_SYSTEM,
-            [{"role": "user", "content": (
-                f"Patient clinical data:\n\n{patient_summary}\n\n"
-                f"Triage assessment:\n{json.dumps(triage, indent=2)}"
-            )}],
-        )
-        total_tokens["prompt"] += usage2["prompt_tokens"]
-        total_tokens["completion"] += usage2["completion_tokens"]
-
         try:
             diagnosis = _parse_json_safe(diagnosis_text)
         except json.JSONDecodeError:
             diagnosis = {"raw_response": diagnosis_text}
 
+        if (
+            not full_report
+            and triage.get("urgency") == "critical"
+            and triage.get("immediate_action_needed") is True
+        ):
+            logger.info("🚨 Critical triage — skipping report generation")
+            red_flags = triage.get("key_red_flags") or []
+            total_tokens["total"] = total_tokens["prompt"] + total_tokens["completion"]
+            return {
+                "patient_input": req,
+                "triage": triage,
+                "diagnosis": diagnosis,
+                "report": strip_markdown(CRITICAL_REPORT.format(
+                    red_flags="\n".join(f"- {flag}" for flag in red_flags)
+                    or "- See the triage assessment",
+                )),
+                "model": request.app.state.ai_model,
+                "tokens_used": total_tokens,
+            }
+
         # =================================================================
         # STEP 3 — Report  (receives everything)
         # =================================================================
@@ -312,8 +356,8 @@ async def analyze_heart(request: Request, req: HeartDiseaseInput):
             request, REPORT_SYSTEM,
             [{"role": "user", "content": (
                 f"Patient clinical data:\n\n{patient_summary}\n\n"
-                f"Triage assessment:\n{json.dumps(triage, indent=2)}\n\n"
-                f"Diagnosis analysis:\n{json.dumps(diagnosis, indent=2)}\n\n"
+                f"Triage assessment:\n{orjson.dumps(triage).decode()}\n\n"
+                f"Diagnosis analysis:\n{orjson.dumps(diagnosis).decode()}\n\n"
                 f"Generate the full patient report now."
             )}],
         )
@@ -325,7 +369,7 @@ async def analyze_heart(request: Request, req: HeartDiseaseInput):
         logger.info("✅ Heart analysis complete — %d total tokens", total_tokens["total"])
 
         return {
-            "patient_input": req.model_dump(),
+            "patient_input": req,
             "triage": triage,
             "diagnosis": diagnosis,
             "report": strip_markdown(report_text),
@@ -333,6 +377,11 @@ async def analyze_heart(request: Request, req: HeartDiseaseInput):
             "tokens_used": total_tokens,
         }
 
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Heart analysis failed: AI provider timed out",
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500,
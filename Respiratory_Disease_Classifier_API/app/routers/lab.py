@@ -9,16 +9,21 @@ Uses Llama 4 Scout vision to:
 
 from __future__ import annotations
 
-import base64
+import asyncio
+import io
 import json
 import logging
 
+import orjson
 from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from PIL import Image, ImageOps
 
 from app.anonymizer import anonymizer
 from app.config import get_settings
+from app.encoding import b64encode
 from app.schemas import LabReportResponse, LabReportType
 from app.text_formatter import strip_markdown
+from app.uploads import file_extension
 
 router = APIRouter(prefix="/lab", tags=["Lab Report Analysis"])
 
@@ -28,7 +33,23 @@ logger = logging.getLogger("uvicorn.error")
 # Allowed image types
 # ---------------------------------------------------------------------------
 
-_ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".pdf"}
+_ALLOWED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".pdf"})
+_ACCEPTED_EXTENSIONS = ", ".join(sorted(_ALLOWED_EXTENSIONS))
+
+# Extensions whose MIME type is not trusted from the client's content type
+_MIME_BY_EXTENSION = {
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".pdf": "application/pdf",
+}
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Vision models downsample anything larger, so bigger photos only cost
+# upload bytes and image tokens. Small uploads are sent as-is.
+_MAX_IMAGE_SIDE = 1568
+_DOWNSCALE_MIN_BYTES = 512 * 1024
+_DOWNSCALE_MIMES = frozenset({"image/jpeg", "image/png", "image/webp"})
 
 # ---------------------------------------------------------------------------
 # Prompts
@@ -201,52 +222,89 @@ Briefly confirm which values are within normal range and what this indicates abo
 
 def _validate_image(file: UploadFile) -> None:
     """Raise 400 if upload is not a supported image."""
-    filename = (file.filename or "").lower()
-    if not any(filename.endswith(ext) for ext in _ALLOWED_EXTENSIONS):
+    if file_extension(file.filename or "") not in _ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file. Accepted: {', '.join(sorted(_ALLOWED_EXTENSIONS))}",
+            detail=f"Unsupported file. Accepted: {_ACCEPTED_EXTENSIONS}",
         )
 
 
 def _detect_mime(filename: str, content_type: str) -> str:
     """Detect MIME type for base64 data URI."""
-    fn = filename.lower()
-    if fn.endswith(".png"):
-        return "image/png"
-    if fn.endswith(".webp"):
-        return "image/webp"
-    if content_type and content_type.startswith("image/"):
+    mime = _MIME_BY_EXTENSION.get(file_extension(filename))
+    if mime is not None:
+        return mime
+    if content_type and (
+        content_type.startswith("image/") or content_type == "application/pdf"
+    ):
         return content_type
     return "image/jpeg"
 
 
+def _downscale(image_bytes: bytes) -> bytes | None:
+    """
+    Shrink a large photo to ``_MAX_IMAGE_SIDE`` on its long side and
+    re-encode it as JPEG (quality 85). Returns ``None`` when the image is
+    already small enough or cannot be decoded.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            if max(img.size) <= _MAX_IMAGE_SIDE:
+                return None
+            # For JPEGs this decodes at a reduced DCT scale first
+            img.thumbnail((_MAX_IMAGE_SIDE, _MAX_IMAGE_SIDE), Image.Resampling.LANCZOS)
+            # The EXIF orientation tag is dropped on re-encode, so apply it
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            out = io.BytesIO()
+            img.save(out, format="JPEG", quality=85, optimize=True)
+            return out.getvalue()
+    except Exception as exc:
+        logger.warning("Lab image downscale skipped: %s", exc)
+        return None
+
+
+def _scrub_and_encode(raw_image_bytes: bytes, mime_type: str) -> tuple[str, int, str]:
+    """
+    Downscale, EXIF-strip and base64-encode an upload; returns
+    ``(b64, scrubbed_size, mime_type)``.
+
+    Runs in a worker thread, and only the base64 string outlives it — the
+    raw and scrubbed buffers are not kept alive across the LLM calls.
+    Raises ``ValueError`` for a PDF that cannot be scrubbed.
+    """
+    if mime_type == "application/pdf":
+        # ANONYMIZATION LAYER 1 (documents): PDF /Info and XMP metadata
+        # carry author / title / subject fields — often the patient's name
+        pdf_bytes = anonymizer.scrub_pdf(raw_image_bytes, field_name="lab_report")
+        return b64encode(pdf_bytes), len(pdf_bytes), mime_type
+
+    if len(raw_image_bytes) >= _DOWNSCALE_MIN_BYTES and mime_type in _DOWNSCALE_MIMES:
+        resized = _downscale(raw_image_bytes)
+        if resized is not None:
+            raw_image_bytes, mime_type = resized, "image/jpeg"
+
+    # ANONYMIZATION LAYER 1: Strip all EXIF / metadata from the image.
+    # Lab printouts photographed or scanned may carry patient name, DOB,
+    # MRN, and facility data in image metadata — all classified as PHI.
+    image_bytes = anonymizer.scrub_image(raw_image_bytes, field_name="lab_report")
+    return b64encode(image_bytes), len(image_bytes), mime_type
+
+
 def _parse_json_safe(text: str) -> dict:
     """Parse JSON from LLM output, handling markdown code fences."""
-    cleaned = text.strip()
-    if cleaned.startswith("```"):
-        lines = cleaned.split("\n")
-        lines = [l for l in lines if not l.strip().startswith("```")]
-        cleaned = "\n".join(lines)
-
-    # Find first { ... } block
-    start = cleaned.find("{")
+    # Outermost { ... } span — skips fences and any prose around the object
+    start = text.find("{")
     if start == -1:
         return {}
-
-    depth = 0
-    end = start
-    for i in range(start, len(cleaned)):
-        if cleaned[i] == "{":
-            depth += 1
-        elif cleaned[i] == "}":
-            depth -= 1
-            if depth == 0:
-                end = i + 1
-                break
-
     try:
-        return json.loads(cleaned[start:end])
+        return orjson.loads(text[start:text.rfind("}") + 1])
+    except orjson.JSONDecodeError:
+        pass
+    # Trailing text containing "}" — decode just the first object
+    try:
+        return _JSON_DECODER.raw_decode(text, start)[0]
     except json.JSONDecodeError:
         return {}
 
@@ -265,7 +323,7 @@ from app.dependencies import invoke_llm
 )
 async def analyze_lab_report(
     request: Request,
-    file: UploadFile = File(..., description="Photo of lab report (JPEG, PNG, WebP)"),
+    file: UploadFile = File(..., description="Photo of lab report (JPEG, PNG, WebP), or a PDF with Bedrock"),
     report_type: LabReportType = Form(
         LabReportType.general,
         description="Type of lab report (helps improve accuracy)",
@@ -285,22 +343,30 @@ async def analyze_lab_report(
     Powered by the configured AI Provider (Bedrock/Groq).
     """
     _validate_image(file)
+    mime_type = _detect_mime(file.filename or "", file.content_type or "")
+
+    # PDFs go to Claude as a document block; Groq's vision models only take images
+    is_pdf = mime_type == "application/pdf"
+    if is_pdf and request.app.state.ai_provider != "bedrock":
+        raise HTTPException(
+            status_code=400,
+            detail="PDF lab reports require the Bedrock provider. Upload a photo or screenshot instead.",
+        )
 
     total_tokens = {"prompt": 0, "completion": 0, "total": 0}
 
     try:
-        # --- Read, EXIF-strip, and encode image ---
-        raw_image_bytes = await file.read()
-        # ANONYMIZATION LAYER 1: Strip all EXIF / metadata from the image.
-        # Lab printouts photographed or scanned may carry patient name, DOB,
-        # MRN, and facility data in image metadata — all classified as PHI.
-        image_bytes = anonymizer.scrub_image(raw_image_bytes, field_name="lab_report")
-        b64_image = base64.b64encode(image_bytes).decode("utf-8")
-        mime_type = _detect_mime(file.filename or "", file.content_type or "")
+        # --- Read, downscale, EXIF-strip, and encode image (off the event loop) ---
+        try:
+            b64_image, image_size, mime_type = await asyncio.to_thread(
+                _scrub_and_encode, await file.read(), mime_type
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
 
         logger.info(
             "🔬 Analyzing lab report (%d KB) — type: %s",
-            len(image_bytes) // 1024, report_type.value,
+            image_size // 1024, report_type.value,
         )
 
         # =================================================================
@@ -313,7 +379,7 @@ async def analyze_lab_report(
                 "role": "user",
                 "content": [
                     {
-                        "type": "image",
+                        "type": "document" if is_pdf else "image",
                         "data": b64_image,
                         "mime": mime_type,
                     },
@@ -353,7 +419,7 @@ async def analyze_lab_report(
                 "role": "user",
                 "content": (
                     f"Lab report type: {report_type.value.replace('_', ' ')}\n\n"
-                    f"Extracted values:\n{json.dumps(extracted, indent=2)}\n\n"
+                    f"Extracted values:\n{orjson.dumps(extracted).decode()}\n\n"
                     "Generate the full patient interpretation report."
                 ),
             }
@@ -382,6 +448,11 @@ async def analyze_lab_report(
 
     except HTTPException:
         raise
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Lab report analysis failed: AI provider timed out",
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500,
@@ -1,28 +1,50 @@
 """
 app.routers.predict
 -------------------
-Audio classification endpoint — upload a WAV → get prediction.
+Audio classification endpoints — upload a WAV (or several) → get prediction.
 """
 
 from __future__ import annotations
 
+import io
 import os
 import tempfile
 
+import anyio.to_thread
 from fastapi import APIRouter, File, HTTPException, Request, UploadFile
 from fastapi.responses import JSONResponse
 
-from app.schemas import PredictionResponse
+from app.schemas import BatchPredictionResponse, PredictionResponse
+from app.uploads import file_extension
 
 router = APIRouter(tags=["Prediction"])
 
+# Uploads are read (and hashed) in chunks of this size. Bodies over 1 MB
+# are spooled to disk, and each read is then a threadpool round-trip.
+_UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Upper bound on files per /predict/batch request (all are held in memory)
+_MAX_BATCH_FILES = 16
+
+# Formats libsndfile decodes straight from memory; anything else goes through
+# ffmpeg (pydub), which needs a real file on disk
+_IN_MEMORY_SUFFIXES = frozenset({".wav", ".flac", ".ogg"})
+
+# Temp-file suffix per non-WAV format, matched on the upload's extension or
+# its content type; checked in order, falling back to ".wav"
+_AUDIO_SUFFIXES = (
+    (".m4a", frozenset({"audio/mp4", "audio/m4a", "audio/x-m4a"})),
+    (".ogg", frozenset({"audio/ogg", "audio/vorbis"})),
+    (".flac", frozenset({"audio/flac"})),
+    (".webm", frozenset({"audio/webm"})),
+    (".aac", frozenset({"audio/aac"})),
+)
+
 
-def _validate_wav(file: UploadFile) -> None:
+def _validate_wav(extension: str, content_type: str) -> None:
     """Raise 400 if the upload doesn't look like a WAV file."""
-    filename = file.filename or ""
-    content_type = file.content_type or ""
     if not (
-        filename.lower().endswith(".wav")
+        extension == ".wav"
         or content_type.startswith("audio/")
         or content_type == "application/octet-stream"
     ):
@@ -32,6 +54,81 @@ def _validate_wav(file: UploadFile) -> None:
         )
 
 
+def _audio_suffix(extension: str, content_type: str) -> str:
+    """Pick the decoder from the extension (temp file only for ffmpeg codecs)."""
+    # Detect extension from filename, fallback to content_type mapping
+    for suffix, content_types in _AUDIO_SUFFIXES:
+        if extension == suffix or content_type in content_types:
+            return suffix
+    return ".wav"  # default: treat as WAV
+
+
+async def _read_upload(file: UploadFile, cache) -> tuple[bytearray, str]:
+    """Read the upload, hashing each chunk as it arrives; returns ``(content, hash)``."""
+    hasher = cache.new_hasher()
+    content = bytearray()
+    while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+        hasher.update(chunk)
+        content += chunk
+    return content, hasher.hexdigest()
+
+
+def _classify(model, pipeline, uploads: list[tuple[bytearray, str]]) -> list[dict]:
+    """
+    Decode ``(content, suffix)`` uploads, extract features and run the
+    classifier; returns one result per upload, in order.
+
+    Blocking (audio decoding, feature extraction, the forest) — runs in a
+    worker thread so the event loop keeps serving other requests, at most
+    ``inference_limiter`` at a time. A batch goes through the pipeline and
+    the forest in one call each.
+    """
+    temp_paths: list[str] = []
+    try:
+        sources = []
+        for index, (content, suffix) in enumerate(uploads):
+            if suffix in _IN_MEMORY_SUFFIXES:
+                # The name tells the loader which decoder to use; it also
+                # keys the loader's output, so it must be unique per batch
+                audio = io.BytesIO(content)
+                audio.name = f"upload{index}{suffix}"
+            else:
+                with tempfile.NamedTemporaryFile(
+                    delete=False, suffix=suffix, prefix="resp_"
+                ) as tmp:
+                    tmp.write(content)
+                    temp_paths.append(tmp.name)
+                audio = tmp.name
+            sources.append(audio)
+
+        # --- Feature extraction ---
+        features_df = pipeline.transform(sources)
+
+        # --- Inference ---
+        # One forest pass: predict() is just classes_[argmax(predict_proba)]
+        classes = model.classes_.tolist()
+        results = []
+        for probabilities in model.predict_proba(features_df):
+            best = int(probabilities.argmax())
+            results.append({
+                "prediction": str(classes[best]),
+                "confidence": round(float(probabilities[best]), 6),
+                "all_probabilities": {
+                    cls: round(prob, 6)
+                    for cls, prob in zip(classes, probabilities.tolist())
+                },
+            })
+        return results
+    finally:
+        for temp_path in temp_paths:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                # On Windows, pydub may still hold the file handle open.
+                # The OS will clean up the temp file on its own.
+                pass
+
+
 @router.post(
     "/predict",
     summary="Classify a respiratory audio sample",
@@ -48,61 +145,28 @@ async def predict(
     - **confidence** – probability of the predicted class (0–1)
     - **all_probabilities** – probability for every class
     """
-    _validate_wav(file)
+    extension = file_extension(file.filename or "")
+    content_type = file.content_type or ""
+    _validate_wav(extension, content_type)
 
     model = request.app.state.model
     pipeline = request.app.state.pipeline
     cache = request.app.state.cache
 
-    temp_path: str | None = None
     try:
-        content = await file.read()
+        content, file_hash = await _read_upload(file, cache)
 
         # --- Cache check ---
-        file_hash = cache.hash_bytes(content)
         cached = cache.get(file_hash)
         if cached is not None:
             return JSONResponse(content=cached)
 
-        # --- Write temp file with correct extension so librosa uses right decoder ---
-        # Detect extension from filename, fallback to content_type mapping
-        orig_name = (file.filename or "").lower()
-        if orig_name.endswith(".m4a") or (file.content_type or "") in ("audio/mp4", "audio/m4a", "audio/x-m4a"):
-            suffix = ".m4a"
-        elif orig_name.endswith(".ogg") or (file.content_type or "") in ("audio/ogg", "audio/vorbis"):
-            suffix = ".ogg"
-        elif orig_name.endswith(".flac") or (file.content_type or "") == "audio/flac":
-            suffix = ".flac"
-        elif orig_name.endswith(".webm") or (file.content_type or "") == "audio/webm":
-            suffix = ".webm"
-        elif orig_name.endswith(".aac") or (file.content_type or "") == "audio/aac":
-            suffix = ".aac"
-        else:
-            suffix = ".wav"  # default: treat as WAV
-
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=suffix, prefix="resp_"
-        ) as tmp:
-            tmp.write(content)
-            temp_path = tmp.name
-
-        # --- Feature extraction ---
-        features_df = pipeline.transform([temp_path])
-
-        # --- Inference ---
-        prediction = model.predict(features_df)[0]
-        probabilities = model.predict_proba(features_df)[0]
-        confidence = float(max(probabilities))
-        all_probs = {
-            cls: round(float(prob), 6)
-            for cls, prob in zip(model.classes_, probabilities)
-        }
-
-        result = {
-            "prediction": str(prediction),
-            "confidence": round(confidence, 6),
-            "all_probabilities": all_probs,
-        }
+        # --- Decode, extract features and classify (off the event loop) ---
+        suffix = _audio_suffix(extension, content_type)
+        [result] = await anyio.to_thread.run_sync(
+            _classify, model, pipeline, [(content, suffix)],
+            limiter=request.app.state.inference_limiter,
+        )
 
         cache.set(file_hash, result)
         return JSONResponse(content=result)
@@ -114,11 +178,65 @@ async def predict(
             status_code=500,
             detail=f"Prediction failed: {str(exc)}",
         ) from exc
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except OSError:
-                # On Windows, pydub may still hold the file handle open.
-                # The OS will clean up the temp file on its own.
-                pass
+
+
+@router.post(
+    "/predict/batch",
+    summary="Classify several respiratory audio samples in one request",
+    response_model=BatchPredictionResponse,
+)
+async def predict_batch(
+    request: Request,
+    files: list[UploadFile] = File(..., description="WAV audio files to classify"),
+):
+    """
+    Upload up to 16 WAV files and receive one `/predict` result per file,
+    in upload order. Files not already cached are decoded together and
+    classified in a single forest pass.
+    """
+    if len(files) > _MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {_MAX_BATCH_FILES} files can be classified per request.",
+        )
+    for file in files:
+        _validate_wav(file_extension(file.filename or ""), file.content_type or "")
+
+    model = request.app.state.model
+    pipeline = request.app.state.pipeline
+    cache = request.app.state.cache
+
+    try:
+        results: list[dict | None] = []
+        # Uncached uploads by hash, so a file repeated in the batch is
+        # classified once; each maps to its positions in the response
+        pending: dict[str, tuple[bytearray, str]] = {}
+        positions: dict[str, list[int]] = {}
+        for index, file in enumerate(files):
+            content, file_hash = await _read_upload(file, cache)
+            cached = cache.get(file_hash)
+            results.append(cached)
+            if cached is None:
+                suffix = _audio_suffix(file_extension(file.filename or ""), file.content_type or "")
+                pending.setdefault(file_hash, (content, suffix))
+                positions.setdefault(file_hash, []).append(index)
+
+        if pending:
+            classified = await anyio.to_thread.run_sync(
+                _classify, model, pipeline, list(pending.values()),
+                limiter=request.app.state.inference_limiter,
+            )
+            for file_hash, result in zip(pending, classified):
+                cache.set(file_hash, result)
+                for index in positions[file_hash]:
+                    results[index] = result
+
+        return JSONResponse(content={"results": results})
+
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch prediction failed: {str(exc)}",
+        ) from exc
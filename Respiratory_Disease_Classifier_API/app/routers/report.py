@@ -4,12 +4,16 @@ app.routers.report
 AI-generated patient report endpoint powered by Groq LLM.
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from app.anonymizer import anonymizer
 from app.config import get_settings
+from app.encoding import sse_event
 from app.schemas import ReportRequest, ReportResponse
-from app.text_formatter import strip_markdown
+from app.text_formatter import MarkdownStreamStripper, strip_markdown
 
 router = APIRouter(tags=["Report"])
 
@@ -142,11 +146,19 @@ def _build_patient_context(req: ReportRequest) -> str:
     return "\n".join(parts)
 
 
+def _build_user_prompt(req: ReportRequest) -> str:
+    return (
+        f"Generate a comprehensive patient report for the following:\n\n"
+        f"{_build_patient_context(req)}\n\n"
+        f"Please provide a thorough, professional medical report."
+    )
+
+
 # ---------------------------------------------------------------------------
 # Route
 # ---------------------------------------------------------------------------
 
-from app.dependencies import invoke_llm
+from app.dependencies import invoke_llm, invoke_llm_stream
 
 # ...
 @router.post(
@@ -162,13 +174,7 @@ async def generate_report(request: Request, req: ReportRequest):
     - **disease** (required) – one of the 8 classified conditions
     - **age**, **height**, **weight** – optional patient details
     """
-    patient_context = _build_patient_context(req)
-
-    user_prompt = (
-        f"Generate a comprehensive patient report for the following:\n\n"
-        f"{patient_context}\n\n"
-        f"Please provide a thorough, professional medical report."
-    )
+    user_prompt = _build_user_prompt(req)
 
     try:
         report_text, usage = await invoke_llm(
@@ -190,8 +196,102 @@ async def generate_report(request: Request, req: ReportRequest):
             "tokens_used": usage,
         }
 
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Report generation failed: AI provider timed out",
+        ) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Report generation failed: {str(exc)}",
+        ) from exc
+
+
+@router.post(
+    "/report/stream",
+    summary="Stream a patient report as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def stream_report(request: Request, req: ReportRequest):
+    """
+    Same report as ``POST /report``, streamed as it is generated.
+
+    Emits ``delta`` events (``{"text": ...}``, plain text, line by line),
+    then a final ``done`` event with the disease, patient info, model and
+    token usage. A failure after the stream has started is reported as an
+    ``error`` event, since the status code has already been sent.
+
+    The whole stream shares one ``settings.llm_deadline_seconds`` budget:
+    running out before the first delta is a 504, afterwards an ``error``
+    event.
+    """
+    deadline_at = asyncio.get_running_loop().time() + request.app.state.settings.llm_deadline_seconds
+    usage: dict = {}
+    tokens = invoke_llm_stream(
+        request,
+        SYSTEM_PROMPT,
+        [{"role": "user", "content": _build_user_prompt(req)}],
+        temperature=0.6,
+        usage=usage,
+    )
+
+    # Wait for the first delta so provider errors still map to a 500
+    try:
+        async with asyncio.timeout_at(deadline_at):
+            first = await anext(tokens, "")
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Report generation failed: AI provider timed out",
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500,
             detail=f"Report generation failed: {str(exc)}",
         ) from exc
+
+    async def token_generator():
+        stripper = MarkdownStreamStripper()
+        try:
+            text = stripper.feed(first)
+            if text:
+                yield sse_event("delta", {"text": text})
+            while True:
+                # Only the provider read is under the deadline — a timeout
+                # around the yield would cancel the response send instead
+                async with asyncio.timeout_at(deadline_at):
+                    chunk = await anext(tokens, None)
+                if chunk is None:
+                    break
+                text = stripper.feed(chunk)
+                if text:
+                    yield sse_event("delta", {"text": text})
+            text = stripper.flush()
+            if text:
+                yield sse_event("delta", {"text": text})
+        except TimeoutError:
+            yield sse_event("error", {"detail": "Report generation failed: AI provider timed out"})
+            return
+        except Exception as exc:
+            yield sse_event("error", {"detail": f"Report generation failed: {str(exc)}"})
+            return
+        finally:
+            await tokens.aclose()
+
+        yield sse_event("done", {
+            "disease": req.disease.value,
+            "patient_info": {
+                "age": req.age,
+                "height": req.height,
+                "weight": req.weight,
+            },
+            "model": request.app.state.ai_model,
+            "tokens_used": usage,
+        })
+
+    return StreamingResponse(
+        token_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -11,31 +11,47 @@ Uses Llama 4 Scout's vision capabilities to analyze:
 
 from __future__ import annotations
 
-import base64
+import asyncio
 import json
 import logging
 
+import orjson
 from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 
 from app.anonymizer import anonymizer
 from app.config import get_settings
+from app.encoding import b64encode, sse_event
 from app.schemas import ScanAnalysisResponse, ScanType
-from app.text_formatter import strip_markdown
+from app.text_formatter import MarkdownStreamStripper, strip_markdown
+from app.uploads import file_extension
 
 router = APIRouter(prefix="/scan", tags=["Medical Imaging"])
 
 logger = logging.getLogger("uvicorn.error")
 
+_JSON_DECODER = json.JSONDecoder()
+
 # ---------------------------------------------------------------------------
 # Allowed image MIME types
 # ---------------------------------------------------------------------------
 
-_ALLOWED_TYPES = {
+_ALLOWED_TYPES = frozenset({
     "image/jpeg", "image/png", "image/webp", "image/gif",
     "application/octet-stream",
-}
-
-_ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+})
+
+_ALLOWED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif"})
+_ACCEPTED_EXTENSIONS = ", ".join(sorted(_ALLOWED_EXTENSIONS))
+
+# Leading bytes of each accepted format; WebP is checked separately since
+# its "WEBP" tag follows the RIFF size field
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
 
 # ---------------------------------------------------------------------------
 # Prompts  (one per scan type for specialized analysis)
@@ -309,6 +325,15 @@ For each finding, characterize:
 ⚕️ **Disclaimer**: AI-assisted analysis. Must be reviewed by a qualified radiologist.""",
 }
 
+# User instruction sent alongside the image, one per scan type
+_SCAN_USER_TEXTS: dict[ScanType, str] = {
+    scan_type: (
+        f"Please analyze this {scan_type.value.replace('_', ' ')} image. "
+        "Provide the JSON findings block first, then the full Markdown report."
+    )
+    for scan_type in ScanType
+}
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -316,10 +341,10 @@ For each finding, characterize:
 
 def _validate_image(file: UploadFile) -> None:
     """Raise 400 if upload is not a supported image."""
-    filename = (file.filename or "").lower()
+    filename = file.filename or ""
     content_type = file.content_type or ""
 
-    ext_ok = any(filename.endswith(ext) for ext in _ALLOWED_EXTENSIONS)
+    ext_ok = file_extension(filename) in _ALLOWED_EXTENSIONS
     type_ok = content_type in _ALLOWED_TYPES
 
     if not (ext_ok or type_ok):
@@ -327,55 +352,104 @@ def _validate_image(file: UploadFile) -> None:
             status_code=400,
             detail=(
                 f"Unsupported file type. "
-                f"Accepted: {', '.join(sorted(_ALLOWED_EXTENSIONS))}. "
-                f"Got: '{filename}' ({content_type})"
+                f"Accepted: {_ACCEPTED_EXTENSIONS}. "
+                f"Got: '{filename.lower()}' ({content_type})"
             ),
         )
 
 
-def _detect_mime(filename: str, content_type: str) -> str:
-    """Detect MIME type for base64 data URI."""
-    fn = filename.lower()
-    if fn.endswith(".png"):
-        return "image/png"
-    if fn.endswith(".webp"):
+async def _sniff_image(file: UploadFile) -> str:
+    """
+    Return the upload's MIME type from its magic bytes; raise 400 otherwise.
+
+    Runs before the full read, so non-image bodies are rejected without
+    buffering or decoding them.
+    """
+    header = await file.read(16)
+    await file.seek(0)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
         return "image/webp"
-    if fn.endswith(".gif"):
-        return "image/gif"
-    if content_type and content_type.startswith("image/"):
-        return content_type
-    return "image/jpeg"  # default
+    for signature, mime in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mime
+    raise HTTPException(
+        status_code=400,
+        detail=(
+            f"File content is not a supported image. "
+            f"Accepted: {_ACCEPTED_EXTENSIONS}. "
+            f"Got: '{(file.filename or '').lower()}'"
+        ),
+    )
+
+
+def _scrub_and_encode(raw_image_bytes: bytes, scan_type: ScanType) -> tuple[str, int]:
+    """
+    EXIF-strip and base64-encode an upload; returns ``(b64, scrubbed_size)``.
+
+    The raw and scrubbed buffers are local to this call, so only the base64
+    string stays alive while the vision model is working.
+    """
+    # ANONYMIZATION: Strip all EXIF / metadata from the image.
+    # Medical imaging devices embed patient name, DOB, MRN, facility name,
+    # and device serial numbers in EXIF headers — all classified as PHI.
+    image_bytes = anonymizer.scrub_image(raw_image_bytes, field_name=f"scan_{scan_type.value}")
+    return b64encode(image_bytes), len(image_bytes)
 
 
 def _extract_json_from_text(text: str) -> dict:
     """Try to extract a JSON object from mixed text/markdown output."""
-    # Find the first { ... } block
+    # Outermost { ... } span — skips fences and any prose around the object
     start = text.find("{")
     if start == -1:
         return {}
-
-    depth = 0
-    end = start
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            depth += 1
-        elif text[i] == "}":
-            depth -= 1
-            if depth == 0:
-                end = i + 1
-                break
-
     try:
-        return json.loads(text[start:end])
+        return orjson.loads(text[start:text.rfind("}") + 1])
+    except orjson.JSONDecodeError:
+        pass
+    # Trailing text containing "}" — decode just the first object
+    try:
+        return _JSON_DECODER.raw_decode(text, start)[0]
     except json.JSONDecodeError:
         return {}
 
 
+async def _build_vision_request(
+    file: UploadFile, scan_type: ScanType, mime_type: str
+) -> tuple[str, list[dict]]:
+    """Scrub the upload and return ``(system_prompt, messages)`` for the vision call."""
+    # --- Read, EXIF-strip, and encode image (off the event loop) ---
+    b64_image, image_size = await asyncio.to_thread(
+        _scrub_and_encode, await file.read(), scan_type
+    )
+    logger.info(
+        "🔬 Analyzing %s image (%d KB) as %s",
+        scan_type.value, image_size // 1024, mime_type,
+    )
+
+    system_prompt = _SCAN_PROMPTS.get(scan_type.value, _SCAN_PROMPTS["chest_xray"])
+
+    # Map to common "AcoustixPulse" format
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "image",
+                    "data": b64_image,
+                    "mime": mime_type,
+                },
+                {"type": "text", "text": _SCAN_USER_TEXTS[scan_type]},
+            ],
+        }
+    ]
+    return system_prompt, messages
+
+
 # ---------------------------------------------------------------------------
 # Route
 # ---------------------------------------------------------------------------
 
-from app.dependencies import invoke_llm
+from app.dependencies import invoke_llm, invoke_llm_stream
 
 # ...
 @router.post(
@@ -399,46 +473,11 @@ async def analyze_scan(
     Powered by the configured AI Provider (Bedrock/Groq).
     """
     _validate_image(file)
+    mime_type = await _sniff_image(file)
 
     try:
-        # --- Read, EXIF-strip, and encode image ---
-        raw_image_bytes = await file.read()
-        # ANONYMIZATION: Strip all EXIF / metadata from the image.
-        # Medical imaging devices embed patient name, DOB, MRN, facility name,
-        # and device serial numbers in EXIF headers — all classified as PHI.
-        image_bytes = anonymizer.scrub_image(raw_image_bytes, field_name=f"scan_{scan_type.value}")
-        b64_image = base64.b64encode(image_bytes).decode("utf-8")
-        mime_type = _detect_mime(file.filename or "", file.content_type or "")
-
-        logger.info(
-            "🔬 Analyzing %s image (%d KB) as %s",
-            scan_type.value, len(image_bytes) // 1024, mime_type,
-        )
-
         # --- AI vision call using common format ---
-        system_prompt = _SCAN_PROMPTS.get(scan_type.value, _SCAN_PROMPTS["chest_xray"])
-
-        # Map to common "AcoustixPulse" format
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "data": b64_image,
-                        "mime": mime_type,
-                    },
-                    {
-                        "type": "text",
-                        "text": (
-                            f"Please analyze this {scan_type.value.replace('_', ' ')} image. "
-                            "Provide the JSON findings block first, then the full Markdown report."
-                        ),
-                    },
-                ],
-            }
-        ]
-
+        system_prompt, messages = await _build_vision_request(file, scan_type, mime_type)
         result_text, usage = await invoke_llm(
             request, system_prompt, messages, temperature=0.3
         )
@@ -456,8 +495,111 @@ async def analyze_scan(
 
     except HTTPException:
         raise
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Scan analysis failed: AI provider timed out",
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500,
             detail=f"Scan analysis failed: {str(exc)}",
         ) from exc
+
+
+@router.post(
+    "/analyze/stream",
+    summary="Stream a medical image analysis as Server-Sent Events",
+    response_class=StreamingResponse,
+)
+async def stream_scan(
+    request: Request,
+    file: UploadFile = File(..., description="Medical image file (JPEG, PNG, WebP)"),
+    scan_type: ScanType = Form(ScanType.chest_xray, description="Type of medical scan"),
+):
+    """
+    Same analysis as ``POST /scan/analyze``, streamed as it is generated.
+
+    Emits ``delta`` events (``{"text": ...}``, the plain-text report), then
+    a final ``done`` event with the scan type, structured findings, model
+    and token usage. A failure after the stream has started is reported as
+    an ``error`` event, since the status code has already been sent.
+
+    The whole stream shares one ``settings.llm_deadline_seconds`` budget:
+    running out before the first delta is a 504, afterwards an ``error``
+    event.
+    """
+    _validate_image(file)
+    mime_type = await _sniff_image(file)
+
+    try:
+        system_prompt, messages = await _build_vision_request(file, scan_type, mime_type)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Scan analysis failed: {str(exc)}",
+        ) from exc
+
+    deadline_at = asyncio.get_running_loop().time() + request.app.state.settings.llm_deadline_seconds
+    usage: dict = {}
+    tokens = invoke_llm_stream(
+        request, system_prompt, messages, temperature=0.3, usage=usage
+    )
+    # Wait for the first delta so provider errors still map to a 500
+    try:
+        async with asyncio.timeout_at(deadline_at):
+            first = await anext(tokens, "")
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Scan analysis failed: AI provider timed out",
+        ) from exc
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Scan analysis failed: {str(exc)}",
+        ) from exc
+
+    async def token_generator():
+        stripper = MarkdownStreamStripper()
+        # Raw output is kept for the findings block, parsed once at the end
+        parts = [first]
+        try:
+            text = stripper.feed(first)
+            if text:
+                yield sse_event("delta", {"text": text})
+            while True:
+                # Only the provider read is under the deadline — a timeout
+                # around the yield would cancel the response send instead
+                async with asyncio.timeout_at(deadline_at):
+                    chunk = await anext(tokens, None)
+                if chunk is None:
+                    break
+                parts.append(chunk)
+                text = stripper.feed(chunk)
+                if text:
+                    yield sse_event("delta", {"text": text})
+            text = stripper.flush()
+            if text:
+                yield sse_event("delta", {"text": text})
+        except TimeoutError:
+            yield sse_event("error", {"detail": "Scan analysis failed: AI provider timed out"})
+            return
+        except Exception as exc:
+            yield sse_event("error", {"detail": f"Scan analysis failed: {str(exc)}"})
+            return
+        finally:
+            await tokens.aclose()
+
+        yield sse_event("done", {
+            "scan_type": scan_type.value,
+            "findings": _extract_json_from_text("".join(parts)),
+            "model": request.app.state.ai_model,
+            "tokens_used": usage,
+        })
+
+    return StreamingResponse(
+        token_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
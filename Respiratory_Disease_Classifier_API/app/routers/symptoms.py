@@ -9,21 +9,25 @@ No server-side sessions, no Redis — the frontend manages chat state.
 
 from __future__ import annotations
 
-import json
 import logging
 
+import orjson
 from fastapi import APIRouter, HTTPException, Request
 
 from app.anonymizer import anonymizer
 
 from app.config import get_settings
 from app.schemas import SymptomChatRequest, SymptomChatResponse
-from app.text_formatter import strip_markdown
+from app.text_formatter import extract_code_block, strip_markdown
 
 router = APIRouter(prefix="/symptoms", tags=["Symptom Checker"])
 
 logger = logging.getLogger("uvicorn.error")
 
+# History sent to the model, in characters (~4 per token): keeps long chats
+# well inside the context window without a model-specific tokenizer
+_MAX_HISTORY_CHARS = 60_000
+
 # ---------------------------------------------------------------------------
 # System prompt
 # ---------------------------------------------------------------------------
@@ -112,6 +116,29 @@ You MUST respond with ONLY valid JSON in this exact structure:
 - Never diagnose definitively — use language like "this pattern is most consistent with" or "could suggest\""""
 
 
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _trim_history(messages: list[dict]) -> list[dict]:
+    """
+    Drop the oldest messages until the history fits ``_MAX_HISTORY_CHARS``.
+
+    The latest message is always kept, and a trimmed history still starts
+    with a user turn.
+    """
+    start = len(messages) - 1
+    used = len(messages[start]["content"])
+    while start > 0 and used + len(messages[start - 1]["content"]) <= _MAX_HISTORY_CHARS:
+        start -= 1
+        used += len(messages[start]["content"])
+    if start:
+        while start < len(messages) - 1 and messages[start]["role"] != "user":
+            start += 1
+        logger.info("✂️  Trimmed %d oldest chat messages to fit the context budget", start)
+    return messages[start:]
+
+
 # ---------------------------------------------------------------------------
 # Route
 # ---------------------------------------------------------------------------
@@ -142,35 +169,26 @@ async def symptom_chat(request: Request, req: SymptomChatRequest):
     # Free-text chat is the highest-risk PHI surface — patients may include
     # their name, DOB, phone number, address, or MRN in natural language.
     # -----------------------------------------------------------------------
-    raw_messages = [
+    raw_messages = _trim_history([
         {"role": msg.role, "content": msg.content}
         for msg in req.messages
-    ]
+    ])
     messages = anonymizer.scrub_messages(raw_messages, field_prefix="symptom_chat")
 
     try:
+        # Replies are one short JSON object; cap runaway generations
         raw_text, usage = await invoke_llm(
-            request, SYSTEM_PROMPT, messages, temperature=0.4
+            request, SYSTEM_PROMPT, messages, temperature=0.4, max_tokens=1536
         )
 
         # Parse structured response
         try:
             # Strip markdown code fences if present
-            cleaned = raw_text.strip()
-            # If the response contains markdown code blocks, extract content
-            if "```" in cleaned:
-                start_code = cleaned.find("```")
-                end_code = cleaned.rfind("```")
-                if start_code != -1 and end_code != -1 and end_code > start_code:
-                    code_block = cleaned[start_code:end_code+3]
-                    lines = code_block.split("\n")
-                    # Remove the fences (e.g. ```json and ```)
-                    content = "\n".join(lines[1:-1])
-                    cleaned = content
+            cleaned = extract_code_block(raw_text.strip())
             
             # Simple JSON parse
-            parsed = json.loads(cleaned)
-        except json.JSONDecodeError:
+            parsed = orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
             # Fallback: return raw text as the reply
             parsed = {
                 "reply": raw_text,
@@ -189,6 +207,11 @@ async def symptom_chat(request: Request, req: SymptomChatRequest):
             "tokens_used": usage,
         }
 
+    except TimeoutError as exc:
+        raise HTTPException(
+            status_code=504,
+            detail="Symptom chat failed: AI provider timed out",
+        ) from exc
     except Exception as exc:
         raise HTTPException(
             status_code=500,
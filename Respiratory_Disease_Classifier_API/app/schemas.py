@@ -4,7 +4,7 @@ app.schemas
 Pydantic models and enums shared across routers.
 """
 
-from enum import Enum
+from enum import StrEnum
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -14,7 +14,7 @@ from pydantic import BaseModel, Field
 # Enums
 # ---------------------------------------------------------------------------
 
-class RespiratoryDisease(str, Enum):
+class RespiratoryDisease(StrEnum):
     """The 8 respiratory conditions the model can classify."""
 
     asthma = "Asthma"
@@ -60,6 +60,12 @@ class PredictionResponse(BaseModel):
     all_probabilities: dict[str, float]
 
 
+class BatchPredictionResponse(BaseModel):
+    """Response from the /predict/batch endpoint — one result per file, in upload order."""
+
+    results: list[PredictionResponse]
+
+
 class ReportResponse(BaseModel):
     """Response from the /report endpoint."""
 
@@ -74,7 +80,7 @@ class ReportResponse(BaseModel):
 # Heart Disease — Enums
 # ---------------------------------------------------------------------------
 
-class ChestPainType(str, Enum):
+class ChestPainType(StrEnum):
     """ASY = Asymptomatic, ATA = Atypical Angina, NAP = Non-Anginal, TA = Typical Angina."""
     asy = "ASY"
     ata = "ATA"
@@ -82,24 +88,24 @@ class ChestPainType(str, Enum):
     ta = "TA"
 
 
-class RestingECG(str, Enum):
+class RestingECG(StrEnum):
     normal = "Normal"
     st = "ST"
     lvh = "LVH"
 
 
-class STSlope(str, Enum):
+class STSlope(StrEnum):
     up = "Up"
     flat = "Flat"
     down = "Down"
 
 
-class Sex(str, Enum):
+class Sex(StrEnum):
     male = "M"
     female = "F"
 
 
-class ExerciseAngina(str, Enum):
+class ExerciseAngina(StrEnum):
     yes = "Y"
     no = "N"
 
@@ -131,7 +137,7 @@ class HeartDiseaseInput(BaseModel):
 class HeartAnalysisResponse(BaseModel):
     """Multi-step analysis response: Triage → Diagnosis → Report."""
 
-    patient_input: dict
+    patient_input: HeartDiseaseInput
     triage: dict
     diagnosis: dict
     report: str
@@ -143,7 +149,7 @@ class HeartAnalysisResponse(BaseModel):
 # Medical Scan — Enums & models
 # ---------------------------------------------------------------------------
 
-class ScanType(str, Enum):
+class ScanType(StrEnum):
     """Supported medical scan types for image analysis."""
     chest_xray = "chest_xray"
     ecg = "ecg"
@@ -230,7 +236,7 @@ class DrugCheckResponse(BaseModel):
 # Lab Report — models
 # ---------------------------------------------------------------------------
 
-class LabReportType(str, Enum):
+class LabReportType(StrEnum):
     """Supported lab report types."""
     blood_test = "blood_test"
     urine_test = "urine_test"
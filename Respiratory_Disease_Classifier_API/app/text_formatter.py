@@ -9,6 +9,19 @@ from __future__ import annotations
 
 import re
 
+# Everything between the first fence line (```json) and the last fence —
+# greedy, so a ``` inside a JSON string does not end the block early
+_CODE_FENCE_RE = re.compile(r"```[^\n]*\n(.*)\n[^\n]*```", re.DOTALL)
+
+
+def extract_code_block(text: str) -> str:
+    """
+    Body of the fenced code block in an LLM reply, without the fence lines
+    and language tag; ``text`` unchanged if it has no fenced block.
+    """
+    match = _CODE_FENCE_RE.search(text)
+    return match.group(1) if match else text
+
 
 def strip_markdown(text: str) -> str:
     """
@@ -38,53 +51,113 @@ def strip_markdown(text: str) -> str:
             result_lines.append(line)
             continue
 
-        # Skip horizontal rules
-        if re.match(r"^[-*_]{3,}\s*$", stripped):
-            result_lines.append("")
-            continue
+        line = _strip_line(line, stripped)
+        if line is not None:
+            result_lines.append(line)
 
-        # Skip pure table separator rows (|---|---|)
-        if re.match(r"^\|[\s\-:|]+\|$", stripped):
-            continue
+    # Join and clean up excessive blank lines (max 2 consecutive)
+    text = "\n".join(result_lines)
+    text = re.sub(r"\n{3,}", "\n\n", text)
 
-        # Convert table rows:  | A | B | C |  →  A  |  B  |  C
-        if stripped.startswith("|") and stripped.endswith("|"):
-            cells = [c.strip() for c in stripped.strip("|").split("|")]
-            line = "  |  ".join(cells)
+    return text.strip()
 
-        # Remove heading markers:  ### Heading  →  Heading
-        line = re.sub(r"^#{1,6}\s+", "", line)
 
-        # Remove bold + italic wrapping:  ***text***  →  text
-        line = re.sub(r"\*{3}(.+?)\*{3}", r"\1", line)
-        # Remove bold:  **text**  →  text
-        line = re.sub(r"\*{2}(.+?)\*{2}", r"\1", line)
-        # Remove italic:  *text*  →  text  (but not bullet points)
-        line = re.sub(r"(?<!\s)\*([^\s*][^*]*?)\*(?!\s)", r"\1", line)
+def _strip_line(line: str, stripped: str) -> str | None:
+    """Plain-text form of one non-code line, or ``None`` to drop it."""
+    # Skip horizontal rules
+    if re.match(r"^[-*_]{3,}\s*$", stripped):
+        return ""
 
-        # Remove underline bold/italic:  __text__  →  text, _text_  →  text
-        line = re.sub(r"_{2}(.+?)_{2}", r"\1", line)
-        line = re.sub(r"(?<!\w)_([^_]+?)_(?!\w)", r"\1", line)
+    # Skip pure table separator rows (|---|---|)
+    if re.match(r"^\|[\s\-:|]+\|$", stripped):
+        return None
 
-        # Remove inline code:  `code`  →  code
-        line = re.sub(r"`([^`]+?)`", r"\1", line)
+    # Convert table rows:  | A | B | C |  →  A  |  B  |  C
+    if stripped.startswith("|") and stripped.endswith("|"):
+        cells = [c.strip() for c in stripped.strip("|").split("|")]
+        line = "  |  ".join(cells)
 
-        # Convert Markdown links:  [text](url)  →  text
-        line = re.sub(r"\[([^\]]+?)\]\([^)]+?\)", r"\1", line)
+    # Remove heading markers:  ### Heading  →  Heading
+    line = re.sub(r"^#{1,6}\s+", "", line)
 
-        # Convert image links:  ![alt](url)  →  alt
-        line = re.sub(r"!\[([^\]]*?)\]\([^)]+?\)", r"\1", line)
+    # Remove bold + italic wrapping:  ***text***  →  text
+    line = re.sub(r"\*{3}(.+?)\*{3}", r"\1", line)
+    # Remove bold:  **text**  →  text
+    line = re.sub(r"\*{2}(.+?)\*{2}", r"\1", line)
+    # Remove italic:  *text*  →  text  (but not bullet points)
+    line = re.sub(r"(?<!\s)\*([^\s*][^*]*?)\*(?!\s)", r"\1", line)
 
-        # Convert bullet points:  - item  or  * item  →  • item
-        line = re.sub(r"^(\s*)[-*]\s+", r"\1• ", line)
+    # Remove underline bold/italic:  __text__  →  text, _text_  →  text
+    line = re.sub(r"_{2}(.+?)_{2}", r"\1", line)
+    line = re.sub(r"(?<!\w)_([^_]+?)_(?!\w)", r"\1", line)
 
-        # Remove blockquote markers:  > text  →  text
-        line = re.sub(r"^>\s?", "", line)
+    # Remove inline code:  `code`  →  code
+    line = re.sub(r"`([^`]+?)`", r"\1", line)
 
-        result_lines.append(line)
+    # Convert Markdown links:  [text](url)  →  text
+    line = re.sub(r"\[([^\]]+?)\]\([^)]+?\)", r"\1", line)
 
-    # Join and clean up excessive blank lines (max 2 consecutive)
-    text = "\n".join(result_lines)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    # Convert image links:  ![alt](url)  →  alt
+    line = re.sub(r"!\[([^\]]*?)\]\([^)]+?\)", r"\1", line)
 
-    return text.strip()
+    # Convert bullet points:  - item  or  * item  →  • item
+    line = re.sub(r"^(\s*)[-*]\s+", r"\1• ", line)
+
+    # Remove blockquote markers:  > text  →  text
+    line = re.sub(r"^>\s?", "", line)
+
+    return line
+
+
+class MarkdownStreamStripper:
+    """
+    Incremental :func:`strip_markdown` for streamed replies.
+
+    ``feed()`` takes raw Markdown deltas and returns the plain text of every
+    line completed so far; ``flush()`` returns the rest once the stream
+    ends. The concatenated output equals ``strip_markdown`` of the full text.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._in_code_block = False
+        self._started = False
+        # Whitespace held back until more content follows, so that blank
+        # runs can be collapsed and trailing whitespace dropped
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if "\n" not in self._buffer:
+            return ""
+        *lines, self._buffer = self._buffer.split("\n")
+        return "".join(self._emit(line) for line in lines)
+
+    def flush(self) -> str:
+        line, self._buffer = self._buffer, ""
+        return self._emit(line)
+
+    def _emit(self, line: str) -> str:
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            self._in_code_block = not self._in_code_block
+            return ""
+        if not self._in_code_block:
+            line = _strip_line(line, stripped)
+            if line is None:
+                return ""
+
+        if not self._started:
+            if not line.strip():
+                return ""
+            self._started = True
+            content = line.strip()
+        else:
+            self._pending += "\n"
+            content = line.rstrip()
+            if not content:
+                self._pending += line
+                return ""
+        out = re.sub(r"\n{3,}", "\n\n", self._pending) + content
+        self._pending = line[len(line.rstrip()):]
+        return out
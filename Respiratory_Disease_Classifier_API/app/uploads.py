@@ -0,0 +1,13 @@
+"""
+app.uploads
+-----------
+Helpers for inspecting uploaded files, shared by the routers.
+"""
+
+from __future__ import annotations
+
+
+def file_extension(filename: str) -> str:
+    """Lower-cased ``.ext`` suffix of ``filename`` (``""`` if it has none)."""
+    dot = filename.rfind(".")
+    return filename[dot:].lower() if dot != -1 else ""
@@ -11,10 +11,17 @@ DO NOT retrain the model here. Inference-only.
 
 import io
 import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 import librosa
 import numpy as np
 import pandas as pd
+import soundfile as sf
+from numba import njit
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
 
@@ -37,6 +44,138 @@ except ImportError:
     pass
 
 
+# librosa.load's default target rate — the rate the model was trained at
+_TARGET_SR = 22050
+
+# Audio read past max_duration so the resampler's filter sees the same
+# context as for the full file (soxr_hq's support is a few milliseconds)
+_RESAMPLE_MARGIN = 1.0
+
+
+def _decode_native(source, max_duration: float | None = None) -> tuple[np.ndarray, int]:
+    """
+    ``librosa.load(source, mono=True)`` via soundfile, optionally reading
+    only the first ``max_duration`` seconds (plus a resampling margin).
+
+    The downmix and 22050 Hz resample are librosa's own, so the samples
+    kept are identical to a full load.
+    """
+    with sf.SoundFile(source) as audio_file:
+        sr = audio_file.samplerate
+        frames = -1 if max_duration is None else int((max_duration + _RESAMPLE_MARGIN) * sr)
+        y_audio = audio_file.read(frames=frames, dtype="float32", always_2d=True)
+    y_audio = librosa.to_mono(y_audio.T)
+    if sr != _TARGET_SR:
+        y_audio = librosa.resample(y_audio, orig_sr=sr, target_sr=_TARGET_SR)
+    return y_audio, _TARGET_SR
+
+
+def _decode_ffmpeg(file_path: str) -> tuple[np.ndarray, int]:
+    """
+    Decode an ffmpeg-readable file to mono float32 at its native rate.
+
+    ffmpeg writes 16-bit PCM WAV (what pydub requested for lossy codecs,
+    so features are unchanged) straight to a pipe — no ffprobe call and
+    no second WAV encode / parse on the Python side.
+    """
+    proc = subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-nostdin", "-i", file_path,
+            "-map", "0:a:0", "-f", "wav", "-c:a", "pcm_s16le", "pipe:1",
+        ],
+        capture_output=True,
+        check=True,
+    )
+    y_audio, sr = sf.read(io.BytesIO(proc.stdout), dtype="float32", always_2d=True)
+    # Same channel average as librosa.load(mono=True)
+    return librosa.to_mono(y_audio.T), sr
+
+
+def _decode_ffmpeg_upload(source) -> tuple[np.ndarray, int]:
+    """
+    ``librosa.load(source, mono=True)`` for a file object libsndfile can't
+    read (e.g. an M4A named ``.wav``), decoded by ffmpeg.
+
+    audioread only takes paths, and ffmpeg cannot seek a pipe (MP4 keeps
+    its index at the end), so the bytes go through a temp file.
+    """
+    source.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, prefix="resp_") as tmp:
+        shutil.copyfileobj(source, tmp)
+    try:
+        y_audio, sr = _decode_ffmpeg(tmp.name)
+    finally:
+        os.remove(tmp.name)
+    if sr != _TARGET_SR:
+        y_audio = librosa.resample(y_audio, orig_sr=sr, target_sr=_TARGET_SR)
+    return y_audio, _TARGET_SR
+
+
+@lru_cache(maxsize=8)
+def _mel_basis(sr: int) -> np.ndarray:
+    """librosa's default (n_fft=2048, 128-band) mel filterbank, built once per rate."""
+    basis = librosa.filters.mel(sr=sr, n_fft=2048)
+    basis.flags.writeable = False
+    return basis
+
+
+@njit(cache=True)
+def _zero_crossing_counts(y, frame_length, hop_length, threshold):
+    """
+    Sign changes per frame of ``y``, matching ``librosa.zero_crossings``.
+
+    Samples within ``threshold`` of zero count as positive. The crossings
+    are prefix-summed once, so overlapping frames are not re-scanned.
+    """
+    n_frames = 1 + (len(y) - frame_length) // hop_length
+    cumulative = np.empty(len(y), dtype=np.int64)
+    cumulative[0] = 0
+    previous = np.signbit(y[0]) and not -threshold <= y[0] <= threshold
+    for i in range(1, len(y)):
+        negative = np.signbit(y[i]) and not -threshold <= y[i] <= threshold
+        cumulative[i] = cumulative[i - 1] + (negative != previous)
+        previous = negative
+
+    counts = np.empty(n_frames, dtype=np.int64)
+    for t in range(n_frames):
+        start = t * hop_length
+        # The first sample of a frame is never a crossing (pad=False)
+        counts[t] = cumulative[start + frame_length - 1] - cumulative[start]
+    return counts
+
+
+def _zero_crossing_rate(y: np.ndarray, frame_length: int = 2048, hop_length: int = 512) -> np.ndarray:
+    """``librosa.feature.zero_crossing_rate(y)`` for mono audio, without per-frame copies."""
+    half = frame_length // 2
+    padded = np.pad(y, (half, half), mode="edge")
+    # librosa compares in the signal's own precision
+    counts = _zero_crossing_counts(padded, frame_length, hop_length, y.dtype.type(1e-10))
+    return (counts / frame_length)[np.newaxis, :]
+
+
+def _spectral_rolloff(magnitude: np.ndarray, freq: np.ndarray, roll_percent: float = 0.85) -> np.ndarray:
+    """
+    ``librosa.feature.spectral_rolloff(S=magnitude)`` as a first-index lookup.
+
+    librosa masks the bins below the threshold with NaN and takes the
+    ``nanmin`` of the frequencies; since ``freq`` ascends, that is the
+    frequency of the first bin at or above the threshold.
+    """
+    total_energy = np.cumsum(magnitude, axis=-2)
+    above = total_energy >= roll_percent * total_energy[-1]
+    return freq[np.argmax(above, axis=-2)][np.newaxis, :]
+
+
+# ---------------------------------------------------------------------------
+# Stateless marker
+# ---------------------------------------------------------------------------
+
+class _StatelessMixin:
+    """Report the transformer as fitted — none of them learn anything in fit()."""
+
+    def __sklearn_is_fitted__(self):
+        return True
+
 
 # ---------------------------------------------------------------------------
 # 1.  AudioLoader
@@ -44,47 +183,82 @@ except ImportError:
 #     Output: dict        — {filename: {'data': np.ndarray, 'sample_rate': int}}
 # ---------------------------------------------------------------------------
 
-class AudioLoader(BaseEstimator, TransformerMixin):
+class AudioLoader(_StatelessMixin, BaseEstimator, TransformerMixin):
     """Load raw audio waveforms from a list of file paths.
 
-    For non-WAV/FLAC/OGG files (e.g. m4a from Android), we use pydub to
-    convert to WAV in-memory before handing to librosa. This avoids the
-    deprecated audioread fallback and works on any format ffmpeg supports.
+    Items may also be in-memory file objects (e.g. ``io.BytesIO``) with a
+    ``name`` attribute carrying the extension; native formats are then
+    decoded straight from memory by soundfile, without a temp file.
+
+    For non-WAV/FLAC/OGG files (e.g. m4a from Android), ffmpeg decodes
+    paths straight to PCM over a pipe; file objects go through pydub. This avoids the deprecated audioread fallback and works on any
+    format ffmpeg supports.
+
+    With ``max_duration`` set, native files are only read up to that point
+    (the pipeline passes the trimmer's target duration).
     """
 
     # Extensions librosa/soundfile can read natively (no ffmpeg needed)
     _NATIVE_EXTS = {".wav", ".flac", ".ogg", ".opus"}
 
+    # Upper bound on files decoded concurrently by one transform() call
+    _MAX_WORKERS = 8
+
+    def __init__(self, max_duration: float | None = None):
+        self.max_duration = max_duration
+
     def fit(self, X, y=None):
         self.fitted_ = True
         return self
 
     def transform(self, X):
-        result = {}
-        for file_path in X:
-            filename = file_path.split("\\")[-1] if "\\" in file_path else file_path.split("/")[-1]
-            ext = os.path.splitext(file_path)[1].lower()
-
-            if ext not in self._NATIVE_EXTS:
-                # Convert to WAV in-memory so librosa can decode without audioread
-                try:
+        X = list(X)
+        workers = min(self._MAX_WORKERS, len(X), os.cpu_count() or 1)
+        if workers < 2:
+            return dict(map(self._load_one, X))
+        # Decoding and resampling run in C with the GIL released, so files
+        # overlap; map() keeps the input order
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(pool.map(self._load_one, X))
+
+    def _load_one(self, source):
+        """Decode one path or file object; returns ``(filename, audio_info)``."""
+        file_path = source if isinstance(source, str) else getattr(source, "name", "")
+        filename = file_path.split("\\")[-1] if "\\" in file_path else file_path.split("/")[-1]
+        ext = os.path.splitext(file_path)[1].lower()
+
+        if ext not in self._NATIVE_EXTS:
+            try:
+                if isinstance(source, str):
+                    y_audio, sr = _decode_ffmpeg(source)
+                else:
+                    # Convert to WAV in-memory so librosa can decode without audioread
                     from pydub import AudioSegment
                     fmt = ext.lstrip(".") or "m4a"
-                    segment = AudioSegment.from_file(file_path, format=fmt)
+                    segment = AudioSegment.from_file(source, format=fmt)
                     buf = io.BytesIO()
                     segment.export(buf, format="wav")
                     buf.seek(0)
                     y_audio, sr = librosa.load(buf, sr=None, mono=True)
-                except Exception as conv_err:
-                    # Last resort: let librosa try on its own
-                    import warnings
-                    warnings.warn(f"pydub conversion failed ({conv_err}), falling back to librosa direct load")
-                    y_audio, sr = librosa.load(file_path, mono=True)
-            else:
-                y_audio, sr = librosa.load(file_path, mono=True)
-
-            result[filename] = {"data": y_audio, "sample_rate": sr}
-        return result
+            except Exception as conv_err:
+                # Last resort: let librosa try on its own
+                import warnings
+                warnings.warn(f"ffmpeg conversion failed ({conv_err}), falling back to librosa direct load")
+                if not isinstance(source, str):
+                    source.seek(0)
+                y_audio, sr = librosa.load(source, mono=True)
+        else:
+            try:
+                y_audio, sr = _decode_native(source, self.max_duration)
+            except sf.SoundFileError:
+                # Mislabelled or unsupported file: librosa's full fallback
+                # chain for paths, ffmpeg for in-memory uploads
+                if isinstance(source, str):
+                    y_audio, sr = librosa.load(source, mono=True)
+                else:
+                    y_audio, sr = _decode_ffmpeg_upload(source)
+
+        return filename, {"data": y_audio, "sample_rate": sr}
 
 
 # ---------------------------------------------------------------------------
@@ -94,7 +268,7 @@ class AudioLoader(BaseEstimator, TransformerMixin):
 #     shortest clip in the training dataset.
 # ---------------------------------------------------------------------------
 
-class AudioTrimmer(BaseEstimator, TransformerMixin):
+class AudioTrimmer(_StatelessMixin, BaseEstimator, TransformerMixin):
     """Trim (or zero-pad) audio to a fixed duration."""
 
     TARGET_DURATION = 7.8560090702947845
@@ -133,7 +307,7 @@ class AudioTrimmer(BaseEstimator, TransformerMixin):
 #     Extracts the same 8 librosa features used during training.
 # ---------------------------------------------------------------------------
 
-class FeatureExtractor(BaseEstimator, TransformerMixin):
+class FeatureExtractor(_StatelessMixin, BaseEstimator, TransformerMixin):
     """Extract the 8 acoustic features used during training."""
 
     def fit(self, X, y=None):
@@ -146,15 +320,27 @@ class FeatureExtractor(BaseEstimator, TransformerMixin):
             y_audio = audio_info["data"]
             sr = audio_info["sample_rate"]
 
+            # One STFT (librosa defaults) shared by every spectral feature;
+            # given y, each call below would recompute exactly this
+            magnitude = np.abs(librosa.stft(y_audio))
+            power = magnitude ** 2
+            # librosa.feature.melspectrogram's product, minus rebuilding the
+            # filterbank (~1.4 ms) on every call
+            mel = np.einsum("...ft,mf->...mt", power, _mel_basis(sr), optimize=True)
+            # Bin frequencies shared by the spectral-shape features; the
+            # centroid is reused by the bandwidth instead of recomputed
+            freq = librosa.fft_frequencies(sr=sr)
+            centroid = librosa.feature.spectral_centroid(S=magnitude, freq=freq)
+
             features[filename] = {
-                "chroma_stft":        librosa.feature.chroma_stft(y=y_audio, sr=sr),
-                "mfcc":               librosa.feature.mfcc(y=y_audio, sr=sr, n_mfcc=13),
-                "mel_spectrogram":    librosa.feature.melspectrogram(y=y_audio, sr=sr),
-                "spectral_contrast":  librosa.feature.spectral_contrast(y=y_audio, sr=sr),
-                "spectral_centroid":  librosa.feature.spectral_centroid(y=y_audio, sr=sr),
-                "spectral_bandwidth": librosa.feature.spectral_bandwidth(y=y_audio, sr=sr),
-                "spectral_rolloff":   librosa.feature.spectral_rolloff(y=y_audio, sr=sr),
-                "zero_crossing_rate": librosa.feature.zero_crossing_rate(y=y_audio),
+                "chroma_stft":        librosa.feature.chroma_stft(S=power, sr=sr),
+                "mfcc":               librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=13),
+                "mel_spectrogram":    mel,
+                "spectral_contrast":  librosa.feature.spectral_contrast(S=magnitude, sr=sr),
+                "spectral_centroid":  centroid,
+                "spectral_bandwidth": librosa.feature.spectral_bandwidth(S=magnitude, freq=freq, centroid=centroid),
+                "spectral_rolloff":   _spectral_rolloff(magnitude, freq),
+                "zero_crossing_rate": _zero_crossing_rate(y_audio),
             }
         return features
 
@@ -167,9 +353,12 @@ class FeatureExtractor(BaseEstimator, TransformerMixin):
 
 _DEFAULT_EXCLUDED = ("mel_spectrogram_min", "chroma_stft_max")
 
+# Column suffix and reduction, in training column order
+_STATISTICS = (("mean", np.mean), ("std", np.std), ("max", np.max), ("min", np.min))
+
 
-class FeatureStatisticsCalculator(BaseEstimator, TransformerMixin):
-    """Compute mean/std/max/min statistics and return a numeric DataFrame."""
+class FeatureStatisticsCalculator(_StatelessMixin, BaseEstimator, TransformerMixin):
+    """Compute mean/std/max/min statistics and return a float32 DataFrame."""
 
     def __init__(self, excluded_features=None):
         self.excluded_features = excluded_features or list(_DEFAULT_EXCLUDED)
@@ -179,25 +368,27 @@ class FeatureStatisticsCalculator(BaseEstimator, TransformerMixin):
         return self
 
     def transform(self, X):
-        rows = []
-        for filename, features in X.items():
-            row = {"filename": filename}
-            for feat_name, feat_data in features.items():
-                row[f"{feat_name}_mean"] = np.mean(feat_data)
-                row[f"{feat_name}_std"]  = np.std(feat_data)
-                row[f"{feat_name}_max"]  = np.max(feat_data)
-                row[f"{feat_name}_min"]  = np.min(feat_data)
-            rows.append(row)
-
-        df = pd.DataFrame(rows)
-
-        # Drop excluded columns
-        df = df.drop(
-            columns=[c for c in self.excluded_features if c in df.columns],
-        )
+        # Every file has the same features in the same order, so the column
+        # layout is fixed: fill one matrix instead of per-row dicts. It is
+        # float32 because that is what the forest's predict() casts X to.
+        feature_names = list(next(iter(X.values()), {}))
+        columns = [
+            f"{feat_name}_{stat_name}"
+            for feat_name in feature_names
+            for stat_name, _ in _STATISTICS
+        ]
+        keep = [i for i, column in enumerate(columns) if column not in self.excluded_features]
+
+        stats = np.empty((len(X), len(columns)), dtype=np.float32)
+        for row, features in enumerate(X.values()):
+            stats[row] = [
+                reduce(features[feat_name])
+                for feat_name in feature_names
+                for _, reduce in _STATISTICS
+            ]
 
-        # Return only numeric columns (drops 'filename')
-        return df.select_dtypes(exclude=["object"])
+        # Excluded columns are dropped; filenames never become a column
+        return pd.DataFrame(stats[:, keep], columns=[columns[i] for i in keep], copy=False)
 
 
 # ---------------------------------------------------------------------------
@@ -214,7 +405,7 @@ def create_respiratory_pipeline() -> Pipeline:
     """
     return Pipeline(
         steps=[
-            ("load_audio",           AudioLoader()),
+            ("load_audio",           AudioLoader(AudioTrimmer.TARGET_DURATION)),
             ("trim_audio",           AudioTrimmer()),
             ("extract_features",     FeatureExtractor()),
             ("calculate_statistics", FeatureStatisticsCalculator()),